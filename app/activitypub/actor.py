@@ -1,4 +1,7 @@
+from functools import lru_cache
+
 from apkit.models import Person, CryptographicKey
+from apkit.server.responses import ActivityResponse
 from app.config import settings
 from app.activitypub.keys import load_public_key_pem
 
@@ -21,3 +24,24 @@ def build_actor() -> Person:
             public_key_pem=load_public_key_pem(),
         ),
     )
+
+
+@lru_cache(maxsize=1)
+def get_actor() -> Person:
+    """
+    Retorna o actor do bot construído uma única vez por processo.
+    O actor só depende das settings e da chave pública em disco — após alterar
+    qualquer um dos dois (ex: settings.reload(), rotação de chaves), chame
+    reload_keys(), que descarta este cache e o de get_actor_document().
+    """
+    return build_actor()
+
+
+@lru_cache(maxsize=1)
+def get_actor_document() -> tuple[bytes, str]:
+    """
+    Documento JSON-LD do actor (o maior corpo servido, inclui a chave PEM) e seu
+    media type, serializados uma única vez — servidos como bytes a cada GET.
+    """
+    response = ActivityResponse(get_actor())
+    return response.body, response.media_type
@@ -0,0 +1,102 @@
+"""
+app/activitypub/client.py
+
+Cliente ActivityPub compartilhado pelo processo.
+
+Abrir um ActivityPubClient por atividade custa uma sessão HTTP nova e um
+handshake TLS por requisição. O lifespan da aplicação abre um único cliente
+no startup e o fecha no shutdown; handlers e worker o obtêm via `client_session()`.
+
+Exporta:
+- `open_client()`    — abre o cliente compartilhado (startup)
+- `close_client()`   — fecha o cliente compartilhado (shutdown)
+- `client_session()` — context manager que fornece o cliente compartilhado,
+                       ou um cliente de vida curta quando não há um aberto
+- `fetch_actor()`    — resolve um actor remoto com cache LRU + TTL em memória
+- `cached_actor()`   — consulta só o cache de fetch_actor(), sem rede
+"""
+
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from apkit.client.asyncio.client import ActivityPubClient
+from apkit.models import Actor as APKitActor
+
+# Actors remotos mudam raramente (chave, inbox) e o mesmo actor costuma enviar
+# várias atividades em sequência — cada acerto no cache evita um GET assinado.
+ACTOR_CACHE_MAX = 2048
+ACTOR_CACHE_TTL = 300.0  # segundos
+
+_client: ActivityPubClient | None = None
+
+# url → (momento da busca em time.monotonic(), actor); ordem = uso mais recente por último.
+# Sem lock: todo acesso acontece no mesmo event loop.
+_actor_cache: OrderedDict[str, tuple[float, APKitActor]] = OrderedDict()
+
+
+async def open_client() -> None:
+    """Abre o cliente compartilhado. Chamado uma única vez no startup."""
+    global _client
+    if _client is None:
+        _client = await ActivityPubClient().__aenter__()
+
+
+async def close_client() -> None:
+    """Fecha o cliente compartilhado, se houver um aberto."""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.__aexit__(None, None, None)
+
+
+@asynccontextmanager
+async def client_session() -> AsyncIterator[ActivityPubClient]:
+    """
+    Fornece o cliente compartilhado sem fechá-lo na saída.
+    Fora do lifespan (scripts, testes) abre um cliente de vida curta.
+    """
+    if _client is not None:
+        yield _client
+        return
+    async with ActivityPubClient() as client:
+        yield client
+
+
+def cached_actor(url: str) -> APKitActor | None:
+    """
+    Actor em cache para `url`, se a entrada tiver menos de ACTOR_CACHE_TTL
+    segundos; None caso contrário. Não faz requisição.
+    """
+    entry = _actor_cache.get(url)
+    if entry is None or time.monotonic() - entry[0] >= ACTOR_CACHE_TTL:
+        return None
+    _actor_cache.move_to_end(url)
+    return entry[1]
+
+
+async def fetch_actor(url: str) -> APKitActor | None:
+    """
+    Resolve o actor remoto em `url`, servindo do cache enquanto a entrada tiver
+    menos de ACTOR_CACHE_TTL segundos. Falhas de resolução (None) não são cacheadas.
+    """
+    cached = cached_actor(url)
+    if cached is not None:
+        return cached
+
+    now = time.monotonic()
+    async with client_session() as client:
+        actor = await client.actor.fetch(url)
+
+    if actor is not None:
+        _actor_cache[url] = (now, actor)
+        _actor_cache.move_to_end(url)
+        while len(_actor_cache) > ACTOR_CACHE_MAX:
+            _actor_cache.popitem(last=False)
+    return actor
+
+
+def clear_actor_cache() -> None:
+    """Esvazia o cache de actors remotos."""
+    _actor_cache.clear()
@@ -6,26 +6,48 @@ Registra os handlers de atividades ActivityPub no servidor apkit.
 Handlers:
 - Follow  → aceita automaticamente, envia Accept assinado e persiste no banco
 - Undo    → remove o follower do banco quando o objeto for um Follow
-- Create  → enfileira para o worker assíncrono e retorna 202 imediatamente
+- Create  → enfileira para o worker assíncrono e retorna 202
+            (429 quando a fila continua cheia após INBOX_PUT_TIMEOUT)
 """
 
+import asyncio
 import logging
 
-from apkit.client.asyncio.client import ActivityPubClient
 from apkit.models import Accept, Actor as APKitActor, Create, Follow, Undo
 from apkit.server.types import Context
 from fastapi import Response
 from fastapi.responses import JSONResponse
 from sqlalchemy import delete as sa_delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from app import database as _db
-from app.activitypub.actor import build_actor
+from app.activitypub.actor import get_actor
+from app.activitypub.client import fetch_actor
 from app.activitypub.keys import get_bot_keys
+from app.config import settings
 from app.models.follower import Follower as FollowerModel
 from app.services import queue as queue_module
 
 log = logging.getLogger(__name__)
 
+# Quanto um Create espera por uma vaga na fila cheia antes do 429 (segundos).
+# Curto o bastante para caber no timeout de entrega do Mastodon.
+INBOX_PUT_TIMEOUT = settings.get("inbox_put_timeout", 1.0)
+
+
+def build_accept(activity: Follow) -> Accept:
+    """
+    Monta o Accept de um Follow. Só `id` e `object` variam entre chamadas:
+    o actor vem do singleton em cache, sem reconstruir o Person do bot.
+
+    Usa model_construct: o Follow já foi validado pelo apkit ao parsear o inbox
+    e os demais campos são gerados aqui, então revalidar tudo é trabalho perdido.
+    """
+    actor_id = get_actor().id
+    return Accept.model_construct(
+        id=f"{actor_id}#accept/{activity.id}", actor=actor_id, object=activity
+    )
+
 
 def register_handlers(app) -> None:
     """
@@ -43,31 +65,30 @@ def register_handlers(app) -> None:
 
         follower_actor = None
         if isinstance(activity.actor, str):
-            async with ActivityPubClient() as client:
-                follower_actor = await client.actor.fetch(activity.actor)
+            follower_actor = await fetch_actor(activity.actor)
         elif isinstance(activity.actor, APKitActor):
             follower_actor = activity.actor
 
         if not follower_actor:
             return JSONResponse({"error": "Could not resolve follower"}, status_code=400)
 
-        actor = build_actor()
-        accept = Accept(
-            id=f"{actor.id}#accept/{activity.id}",
-            actor=actor.id,
-            object=activity,
-        )
-
         keys = await get_bot_keys()
-        await ctx.send(keys, follower_actor, accept)
+        await ctx.send(keys, follower_actor, build_accept(activity))
 
         inbox = follower_actor.inbox
         inbox_url = inbox if isinstance(inbox, str) else (inbox.id if inbox else "")
+        # Upsert via Core: um único INSERT ... ON CONFLICT, sem o SELECT
+        # e o identity map que session.merge() exigiria
+        upsert = sqlite_insert(FollowerModel).values(
+            actor_url=follower_actor.id, inbox_url=inbox_url or ""
+        )
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[FollowerModel.actor_url],
+            set_={"inbox_url": upsert.excluded.inbox_url},
+        )
         async with _db.async_session_factory() as session:
             async with session.begin():
-                await session.merge(
-                    FollowerModel(actor_url=follower_actor.id, inbox_url=inbox_url or "")
-                )
+                await session.execute(upsert)
 
         log.info(f"Follow aceito e persistido: {follower_actor.id}")
         return Response(status_code=202)
@@ -107,12 +128,24 @@ def register_handlers(app) -> None:
     @app.on(Create)
     async def on_create(ctx: Context):
         """
-        Enfileira a atividade para o worker assíncrono e retorna 202 imediatamente.
-        Mastodon tem timeout curto — nunca bloquear no handler.
+        Enfileira a atividade para o worker assíncrono e retorna 202.
 
         Enfileira ctx.activity (não ctx) para que o worker não dependa
         do contexto interno do apkit, que não é válido fora do escopo do handler.
+
+        Com a fila cheia, aguarda uma vaga por até INBOX_PUT_TIMEOUT — a pressão
+        chega ao servidor remoto como latência. Se a vaga não surgir, descarta a
+        atividade e responde 429: Mastodon tem timeout curto e tenta novamente
+        mais tarde, então o handler nunca fica preso.
         """
         log.info(f"Create recebido de {ctx.activity.actor}")
-        await queue_module.activity_queue.put(ctx.activity)
+        queue = queue_module.activity_queue
+        try:
+            queue.put_nowait(ctx.activity)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(queue.put(ctx.activity), timeout=INBOX_PUT_TIMEOUT)
+            except TimeoutError:
+                log.warning(f"Fila do inbox cheia — Create de {ctx.activity.actor} descartado")
+                return Response(status_code=429)
         return Response(status_code=202)
@@ -1,27 +1,65 @@
+from functools import cache
+
 from cryptography.hazmat.primitives import serialization
 from apkit.server.types import ActorKey
 from app.config import settings
 
 
+@cache
 def load_private_key():
+    """Lê e decodifica a chave privada uma única vez por processo."""
     with open(settings.private_key_path, "rb") as f:
         return serialization.load_pem_private_key(f.read(), password=None)
 
 
+@cache
 def load_public_key_pem() -> str:
+    """Lê a chave pública (PEM) uma única vez por processo."""
     with open(settings.public_key_path) as f:
         return f.read()
 
 
+def reload_keys() -> None:
+    """
+    Descarta as chaves em cache para que a próxima leitura volte ao disco.
+    Necessário após alterar private_key_path/public_key_path (ex: rotação de chaves, testes).
+    Descarta também o actor e seu documento, que publicam a chave pública.
+    """
+    # Import local: actor.py importa este módulo
+    from app.activitypub.actor import get_actor, get_actor_document
+
+    load_private_key.cache_clear()
+    load_public_key_pem.cache_clear()
+    _bot_actor_keys.cache_clear()
+    get_actor.cache_clear()
+    get_actor_document.cache_clear()
+
+
+def preload_keys() -> None:
+    """
+    Aquece o cache das chaves. Chamado no startup via asyncio.to_thread,
+    para que leitura de disco e decodificação do PEM nunca ocorram no event loop.
+    """
+    load_private_key()
+    load_public_key_pem()
+    _bot_actor_keys()
+
+
+@cache
+def _bot_actor_keys() -> list[ActorKey]:
+    """Monta a lista de chaves do bot uma única vez; a mesma lista serve todas as assinaturas."""
+    key_id = f"https://{settings.domain}/users/{settings.bot_username}#main-key"
+    return [ActorKey(key_id=key_id, private_key=load_private_key())]
+
+
 async def get_keys_for_actor(identifier: str) -> list[ActorKey]:
     """
     Callback exigido pelo apkit para assinar atividades de saída.
     Recebe o `identifier` (username na URL) e retorna a(s) chave(s) do actor.
+    A lista retornada é compartilhada — não deve ser modificada pelo chamador.
     """
     if identifier == settings.bot_username:
-        private_key = load_private_key()
-        key_id = f"https://{settings.domain}/users/{settings.bot_username}#main-key"
-        return [ActorKey(key_id=key_id, private_key=private_key)]
+        return _bot_actor_keys()
     return []
 
 
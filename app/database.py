@@ -7,13 +7,18 @@ Exporta:
 - `engine`               — engine assíncrona compartilhada
 - `async_session_factory` — fábrica de sessões para uso nos repositórios
 - `Base`                 — classe base para os modelos ORM
-- `get_session()`        — dependência FastAPI que fornece sessão por request
+- `get_session_factory()` — dependência FastAPI que fornece a fábrica de sessões
+- `get_session()`        — dependência FastAPI que fornece sessão por request (sem transação)
 - `init_db()`            — cria as tabelas na inicialização da aplicação
 """
 
-from typing import AsyncGenerator
+from typing import Annotated, Any, AsyncGenerator
 
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
@@ -26,12 +31,47 @@ from app.config import settings
 # Engine
 # ---------------------------------------------------------------------------
 
+# Aplicados em cada conexão nova do pool.
+# WAL permite leituras concorrentes com a escrita e, com synchronous=NORMAL,
+# evita um fsync por commit — seguro em WAL, perde no máximo o último commit
+# numa queda de energia, nunca corrompe o banco.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",  # 256 MiB
+    "PRAGMA cache_size=-64000",  # ~64 MB (valor negativo = KiB)
+)
+
+
+def _engine_options(url: str) -> dict[str, Any]:
+    """
+    Pool explícito para bancos em arquivo.
+    Bancos :memory: mantêm o StaticPool padrão do dialeto — cada conexão
+    nova seria um banco vazio diferente.
+    """
+    database = make_url(url).database
+    if not database or database == ":memory:":
+        return {}
+    return {"pool_size": 5, "max_overflow": 10}
+
+
 engine = create_async_engine(
     settings.database_url,
     echo=False,
     connect_args={"check_same_thread": False},
+    **_engine_options(settings.database_url),
 )
 
+
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
 # ---------------------------------------------------------------------------
 # Fábrica de sessões
 # ---------------------------------------------------------------------------
@@ -58,14 +98,28 @@ class Base(DeclarativeBase):
 # ---------------------------------------------------------------------------
 
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
+SessionFactory = async_sessionmaker[AsyncSession]
+
+
+def get_session_factory() -> SessionFactory:
+    """Fábrica usada por get_session. Substituível via app.dependency_overrides."""
+    return async_session_factory
+
+
+async def get_session(
+    factory: Annotated[SessionFactory | None, Depends(get_session_factory)] = None,
+) -> AsyncGenerator[AsyncSession, None]:
     """
     Dependência FastAPI que fornece uma sessão de banco por request.
-    Faz commit automático em caso de sucesso e rollback em caso de exceção.
+    Não abre transação: rotas de leitura não pagam BEGIN/COMMIT.
+    Quem escreve faz `await session.commit()` explicitamente; o que não for
+    commitado é descartado (rollback) ao fechar a sessão, inclusive em exceção.
+
+    Chamada diretamente (fora do FastAPI), aceita a fábrica como argumento —
+    sem ela, usa async_session_factory.
     """
-    async with async_session_factory() as session:
-        async with session.begin():
-            yield session
+    async with (factory or async_session_factory)() as session:
+        yield session
 
 
 # ---------------------------------------------------------------------------
@@ -73,14 +127,15 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
 # ---------------------------------------------------------------------------
 
 
-async def init_db() -> None:
+async def init_db(bind: AsyncEngine | None = None) -> None:
     """
     Cria todas as tabelas definidas nos modelos ORM caso ainda não existam.
     Deve ser chamado uma única vez no startup da aplicação (lifespan do FastAPI).
+    `bind` permite apontar para outra engine (ex: testes); o padrão é `engine`.
     """
     # Importa os modelos para que o SQLAlchemy os registre no metadata da Base
     # antes de criar as tabelas. Sem este import, as tabelas não serão criadas.
     from app.models import follower  # noqa: F401
 
-    async with engine.begin() as conn:
+    async with (bind or engine).begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
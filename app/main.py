@@ -1,4 +1,5 @@
 import asyncio
+import json
 import logging
 from contextlib import asynccontextmanager
 
@@ -18,7 +19,7 @@ from fastapi.responses import JSONResponse
 from sqlalchemy import select
 
 from app import database as _db
-from app.activitypub.actor import build_actor
+from app.activitypub.actor import get_actor_document
 from app.activitypub.handlers import register_handlers
 from app.config import settings
 from app.models.follower import Follower
@@ -26,15 +27,66 @@ from app.services.note_store import get_note
 
 logging.basicConfig(level=logging.INFO)
 
-actor = build_actor()
+# URLs do bot — dependem apenas das settings, calculadas uma vez no import
+BASE_URL = f"https://{settings.domain}"
+ACTOR_URL = f"{BASE_URL}/users/{settings.bot_username}"
+FOLLOWERS_URL = f"{ACTOR_URL}/followers"
+OUTBOX_URL = f"{ACTOR_URL}/outbox"
+
+# O bot não publica no outbox — a coleção é sempre vazia
+OUTBOX_COLLECTION = {
+    "@context": "https://www.w3.org/ns/activitystreams",
+    "id": OUTBOX_URL,
+    "type": "OrderedCollection",
+    "totalItems": 0,
+    "orderedItems": [],
+}
+OUTBOX_BODY = json.dumps(OUTBOX_COLLECTION, separators=(",", ":")).encode()
+
+# NodeInfo também só depende das settings: serializado uma vez, servido como bytes
+_nodeinfo_response = ActivityResponse(
+    Nodeinfo(
+        version="2.1",
+        software=NodeinfoSoftware(name="translate-bot", version="1.0.0"),
+        protocols=["activitypub"],
+        services=NodeinfoServices(inbound=[], outbound=[]),
+        openRegistrations=False,
+        usage=NodeinfoUsage(users=NodeinfoUsageUsers(total=1)),
+        metadata={},
+    )
+)
+NODEINFO_BODY = _nodeinfo_response.body
+NODEINFO_MEDIA_TYPE = _nodeinfo_response.media_type
+
+# O único recurso WebFinger que o servidor resolve é o próprio bot
+WEBFINGER_BODY = JSONResponse(
+    WebfingerResult(
+        subject=WebfingerResource(username=settings.bot_username, host=settings.domain),
+        links=[WebfingerLink(rel="self", type="application/activity+json", href=ACTOR_URL)],
+    ).to_json()
+).body
+
+# Corpo 404 fixo: serializado uma vez em vez de passar pelo encoder JSON a cada GET.
+# O documento do actor vem de get_actor_document(), memoizado até reload_keys().
+NOT_FOUND_BODY = json.dumps({"error": "Not found"}, separators=(",", ":")).encode()
+
+
+def _not_found() -> Response:
+    return Response(content=NOT_FOUND_BODY, status_code=404, media_type="application/json")
 
 
 @asynccontextmanager
 async def lifespan(app):
+    import app.activitypub.client
+    import app.activitypub.keys
     import app.database
+    import app.services.translate
     import workers.inbox_worker
 
     await app.database.init_db()
+    await asyncio.to_thread(app.activitypub.keys.preload_keys)
+    get_actor_document()  # serializa o documento do actor antes do primeiro GET
+    await app.activitypub.client.open_client()
     worker_task = asyncio.create_task(workers.inbox_worker.run_worker())
     yield
     worker_task.cancel()
@@ -42,6 +94,8 @@ async def lifespan(app):
         await worker_task
     except asyncio.CancelledError:
         pass
+    await app.activitypub.client.close_client()
+    await app.services.translate.close_client()
 
 
 api = ActivityPubServer(lifespan=lifespan)
@@ -52,54 +106,37 @@ api.inbox("/users/{identifier}/inbox")
 @api.get("/users/{identifier}")
 async def get_actor(identifier: str):
     if identifier == settings.bot_username:
-        return ActivityResponse(actor)
-    return JSONResponse({"error": "Not found"}, status_code=404)
+        body, media_type = get_actor_document()
+        return Response(content=body, media_type=media_type)
+    return _not_found()
 
 
 @api.webfinger()
 async def webfinger(request: Request, acct: WebfingerResource) -> Response:
-    bot_actor_url = f"https://{settings.domain}/users/{settings.bot_username}"
     is_match = (
         acct.username == settings.bot_username and acct.host == settings.domain
-    ) or acct.url == bot_actor_url
+    ) or acct.url == ACTOR_URL
     if is_match:
-        bot_subject = WebfingerResource(username=settings.bot_username, host=settings.domain)
-        link = WebfingerLink(
-            rel="self",
-            type="application/activity+json",
-            href=bot_actor_url,
-        )
-        result = WebfingerResult(subject=bot_subject, links=[link])
-        return JSONResponse(result.to_json(), media_type="application/jrd+json")
-    return JSONResponse({"error": "Not found"}, status_code=404)
+        return Response(content=WEBFINGER_BODY, media_type="application/jrd+json")
+    return _not_found()
 
 
 @api.nodeinfo("/nodeinfo/2.1", "2.1")
 async def nodeinfo():
-    return ActivityResponse(
-        Nodeinfo(
-            version="2.1",
-            software=NodeinfoSoftware(name="translate-bot", version="1.0.0"),
-            protocols=["activitypub"],
-            services=NodeinfoServices(inbound=[], outbound=[]),
-            openRegistrations=False,
-            usage=NodeinfoUsage(users=NodeinfoUsageUsers(total=1)),
-            metadata={},
-        )
-    )
+    return Response(content=NODEINFO_BODY, media_type=NODEINFO_MEDIA_TYPE)
 
 
 @api.get("/users/{identifier}/followers")
 async def get_followers(identifier: str):
     if identifier != settings.bot_username:
-        return JSONResponse({"error": "Not found"}, status_code=404)
+        return _not_found()
     async with _db.async_session_factory() as session:
         result = await session.execute(select(Follower))
         followers = result.scalars().all()
     return JSONResponse(
         {
             "@context": "https://www.w3.org/ns/activitystreams",
-            "id": f"https://{settings.domain}/users/{identifier}/followers",
+            "id": FOLLOWERS_URL,
             "type": "OrderedCollection",
             "totalItems": len(followers),
             "orderedItems": [f.actor_url for f in followers],
@@ -111,26 +148,17 @@ async def get_followers(identifier: str):
 @api.get("/users/{identifier}/outbox")
 async def get_outbox(identifier: str):
     if identifier != settings.bot_username:
-        return JSONResponse({"error": "Not found"}, status_code=404)
-    return JSONResponse(
-        {
-            "@context": "https://www.w3.org/ns/activitystreams",
-            "id": f"https://{settings.domain}/users/{identifier}/outbox",
-            "type": "OrderedCollection",
-            "totalItems": 0,
-            "orderedItems": [],
-        },
-        media_type="application/activity+json",
-    )
+        return _not_found()
+    return Response(content=OUTBOX_BODY, media_type="application/activity+json")
 
 
 @api.get("/users/{identifier}/notes/{note_id}")
 async def get_note_endpoint(identifier: str, note_id: str):
     if identifier != settings.bot_username:
-        return JSONResponse({"error": "Not found"}, status_code=404)
+        return _not_found()
     note = get_note(note_id)
     if note is None:
-        return JSONResponse({"error": "Not found"}, status_code=404)
+        return _not_found()
     return ActivityResponse(note)
 
 
@@ -10,7 +10,7 @@ permitindo entregar atividades futuras para os followers
 
 from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, String
+from sqlalchemy import DateTime, Index, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
@@ -18,6 +18,12 @@ from app.database import Base
 
 class Follower(Base):
     __tablename__ = "followers"
+    # inbox_url: entrega agrupada por inbox (shared inbox) sem varrer a tabela
+    # followed_at: paginação da coleção de followers por data
+    __table_args__ = (
+        Index("ix_followers_inbox_url", "inbox_url"),
+        Index("ix_followers_followed_at", "followed_at"),
+    )
 
     # URL canônica do actor remoto — identificador único no Fediverso
     # ex: "https://mastodon.social/users/fulano"
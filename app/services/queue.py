@@ -1,5 +1,85 @@
 import asyncio
+from collections import deque
+from typing import Any
 
-# Fila compartilhada entre handlers e worker.
+from app.config import settings
+
+
+class InboxChannel:
+    """
+    Canal entre os handlers do inbox (produtores) e o worker (consumidor).
+
+    Um deque + asyncio.Event no lugar de asyncio.Queue: put_nowait/get_nowait
+    são um append/popleft, sem criar e cancelar futures de getters/putters a
+    cada item. Expõe o subconjunto da interface de asyncio.Queue usado no
+    projeto (put_nowait, put, get, get_nowait, task_done, join), então uma
+    asyncio.Queue continua servindo de substituta nos testes.
+    """
+
+    def __init__(self, maxsize: int = 0) -> None:
+        self.maxsize = maxsize
+        self._items: deque[Any] = deque()
+        self._ready = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._unfinished = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def full(self) -> bool:
+        return 0 < self.maxsize <= len(self._items)
+
+    def put_nowait(self, item: Any) -> None:
+        """Enfileira sem bloquear. Levanta asyncio.QueueFull se o canal estiver cheio."""
+        if self.full():
+            raise asyncio.QueueFull
+        self._items.append(item)
+        self._unfinished += 1
+        self._idle.clear()
+        self._ready.set()
+
+    async def put(self, item: Any) -> None:
+        """Aguarda até haver espaço no canal e enfileira."""
+        while self.full():
+            self._not_full.clear()
+            await self._not_full.wait()
+        self.put_nowait(item)
+
+    def get_nowait(self) -> Any:
+        """Retira sem bloquear. Levanta asyncio.QueueEmpty se não houver itens."""
+        if not self._items:
+            raise asyncio.QueueEmpty
+        self._not_full.set()
+        return self._items.popleft()
+
+    async def get(self) -> Any:
+        """Aguarda até haver um item e o retira."""
+        while not self._items:
+            self._ready.clear()
+            await self._ready.wait()
+        self._not_full.set()
+        return self._items.popleft()
+
+    def task_done(self) -> None:
+        if self._unfinished <= 0:
+            raise ValueError("task_done() called too many times")
+        self._unfinished -= 1
+        if self._unfinished == 0:
+            self._idle.set()
+
+    async def join(self) -> None:
+        """Aguarda até que todo item enfileirado tenha recebido task_done()."""
+        await self._idle.wait()
+
+
+# Canal compartilhado entre handlers e worker.
+# Limitado para que um pico de atividades não cresça a memória sem controle:
+# quando cheio, o inbox aguarda uma vaga por pouco tempo e então responde 429.
 # Para produção com alto volume, substituir por SQLite-backed queue.
-activity_queue: asyncio.Queue = asyncio.Queue()
+activity_queue: InboxChannel = InboxChannel(maxsize=settings.get("inbox_queue_max", 1024))
@@ -1,26 +1,66 @@
+from typing import Any
+
 import httpx
 from app.config import settings
 
+# Cliente HTTP reutilizado entre traduções — mantém conexões keep-alive com a
+# instância LibreTranslate em vez de pagar TCP + TLS a cada post traduzido.
+# Criado no primeiro uso; fechado no shutdown da aplicação via close_client().
+_client: httpx.AsyncClient | None = None
 
-async def translate_text(text: str, target: str | None = None) -> dict:
-    """Traduz texto usando LibreTranslate."""
-    target = target or settings.target_language
-
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            f"{settings.libretranslate_url}/translate",
-            json={
-                "q": text,
-                "source": "auto",
-                "target": target,
-                "api_key": settings.get("libretranslate_api_key", ""),
-            },
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
             timeout=15,
+            limits=httpx.Limits(max_keepalive_connections=32),
         )
-        resp.raise_for_status()
-        data = resp.json()
+    return _client
+
+
+async def close_client() -> None:
+    """Fecha o cliente HTTP compartilhado, se tiver sido criado."""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+
+
+async def _request_translation(q: str | list[str], target: str | None) -> dict[str, Any]:
+    resp = await _get_client().post(
+        f"{settings.libretranslate_url}/translate",
+        json={
+            "q": q,
+            "source": "auto",
+            "target": target or settings.target_language,
+            "api_key": settings.get("libretranslate_api_key", ""),
+        },
+    )
+    resp.raise_for_status()
+    data: dict[str, Any] = resp.json()
+    return data
 
+
+def _result(translated: str, detected: dict[str, Any] | None) -> dict[str, str]:
     return {
-        "translated": data["translatedText"],
-        "detected_source": data.get("detectedLanguage", {}).get("language", "?"),
+        "translated": translated,
+        "detected_source": (detected or {}).get("language", "?"),
     }
+
+
+async def translate_text(text: str, target: str | None = None) -> dict[str, str]:
+    """Traduz texto usando LibreTranslate."""
+    data = await _request_translation(text, target)
+    return _result(data["translatedText"], data.get("detectedLanguage"))
+
+
+async def translate_texts(texts: list[str], target: str | None = None) -> list[dict[str, str]]:
+    """
+    Traduz vários textos numa única requisição — a LibreTranslate aceita `q`
+    como lista e responde com listas na mesma ordem. Resultados no formato
+    de translate_text.
+    """
+    data = await _request_translation(texts, target)
+    detected = data.get("detectedLanguage") or [None] * len(texts)
+    return [_result(t, d) for t, d in zip(data["translatedText"], detected, strict=True)]
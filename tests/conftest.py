@@ -2,7 +2,8 @@
 Fixtures compartilhadas entre todos os testes.
 """
 
-from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
+from functools import cache
 
 import pytest
 import pytest_asyncio
@@ -10,6 +11,29 @@ from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
 
 
+def pytest_collection_modifyitems(items):
+    """
+    Agrupa os testes assíncronos no início da execução, mantendo a ordem
+    relativa (sort estável). O loop da sessão atende todos em sequência, sem
+    alternar com os testes síncronos.
+    """
+    items.sort(key=lambda item: not pytest_asyncio.is_async_test(item))
+
+
+@pytest.fixture(scope="session")
+def event_loop_policy():
+    """
+    Roda o loop da sessão sobre o uvloop quando disponível — menos custo por
+    tarefa nas dezenas de round-trips ASGI da suíte. Sem uvloop (ex: Windows),
+    mantém a política padrão do asyncio.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.get_event_loop_policy()
+    return uvloop.EventLoopPolicy()
+
+
 # ---------------------------------------------------------------------------
 # Chaves RSA geradas em memória — evita dependência de arquivos em disco
 # ---------------------------------------------------------------------------
@@ -48,30 +72,57 @@ def rsa_public_key_pem(rsa_private_key) -> str:
 # ---------------------------------------------------------------------------
 
 
-@pytest.fixture(autouse=True)
-def patch_settings(monkeypatch, rsa_private_key_pem, rsa_public_key_pem, tmp_path):
+@pytest.fixture(scope="session")
+def test_settings(rsa_private_key_pem, rsa_public_key_pem, tmp_path_factory):
     """
-    Sobrescreve as settings do Dynaconf com valores de teste.
-    `autouse=True` garante que nenhum teste acesse configurações reais
-    ou tente ler arquivos de chave do disco.
+    Sobrescreve as settings do Dynaconf com valores de teste uma única vez por sessão.
+    Vale desde antes de qualquer fixture de sessão que importe app.main — cujas
+    URLs e documentos pré-renderizados são calculados no import.
     """
     from app import config
 
     # Escreve as chaves em arquivos temporários para os módulos que usam open()
-    private_pem_path = tmp_path / "private.pem"
-    public_pem_path = tmp_path / "public.pem"
+    keys_dir = tmp_path_factory.mktemp("keys")
+    private_pem_path = keys_dir / "private.pem"
+    public_pem_path = keys_dir / "public.pem"
     private_pem_path.write_bytes(rsa_private_key_pem)
     public_pem_path.write_text(rsa_public_key_pem)
 
-    monkeypatch.setattr(config.settings, "domain", "bot.test")
-    monkeypatch.setattr(config.settings, "bot_username", "testbot")
-    monkeypatch.setattr(config.settings, "bot_display_name", "Test Bot")
-    monkeypatch.setattr(config.settings, "bot_summary", "Bot de teste")
-    monkeypatch.setattr(config.settings, "target_language", "pt")
-    monkeypatch.setattr(config.settings, "libretranslate_url", "http://libretranslate.test")
-    monkeypatch.setattr(config.settings, "libretranslate_api_key", "fake-api-key", raising=False)
-    monkeypatch.setattr(config.settings, "private_key_path", str(private_pem_path))
-    monkeypatch.setattr(config.settings, "public_key_path", str(public_pem_path))
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(config.settings, "domain", "bot.test")
+        mp.setattr(config.settings, "bot_username", "testbot")
+        mp.setattr(config.settings, "bot_display_name", "Test Bot")
+        mp.setattr(config.settings, "bot_summary", "Bot de teste")
+        mp.setattr(config.settings, "target_language", "pt")
+        mp.setattr(config.settings, "libretranslate_url", "http://libretranslate.test")
+        mp.setattr(config.settings, "libretranslate_api_key", "fake-api-key", raising=False)
+        mp.setattr(config.settings, "private_key_path", str(private_pem_path))
+        mp.setattr(config.settings, "public_key_path", str(public_pem_path))
+        yield config.settings
+
+
+@pytest.fixture(autouse=True)
+def patch_settings(test_settings):
+    """
+    `autouse=True` garante que nenhum teste acesse configurações reais
+    ou tente ler arquivos de chave do disco. Um teste que altere as settings
+    via monkeypatch volta aos valores de teste ao terminar.
+    """
+    # Chaves e actor são memoizados por processo — descarta os caches
+    # para que alterações feitas por um teste não vazem para o próximo
+    from app.activitypub.keys import reload_keys
+
+    reload_keys()
+
+
+@pytest.fixture(autouse=True)
+def clear_actor_cache():
+    """O cache de actors remotos é global ao processo — cada teste começa vazio."""
+    from app.activitypub.client import clear_actor_cache
+
+    clear_actor_cache()
+    yield
+    clear_actor_cache()
 
 
 # ---------------------------------------------------------------------------
@@ -141,39 +192,122 @@ def make_follow(remote_actor_url, bot_actor_url):
     return _make
 
 
-@pytest_asyncio.fixture
-async def in_memory_db():
+# ---------------------------------------------------------------------------
+# Banco de dados
+# ---------------------------------------------------------------------------
+
+
+@cache
+def schema_ddl() -> tuple[str, ...]:
     """
-    Banco SQLite em memória isolado por teste.
-    Patcha app.database.async_session_factory para que handlers e endpoints
-    usem este banco nos testes, sem tocar em arquivos em disco.
-    Retorna a fábrica de sessões para que os testes possam semear e verificar dados.
+    CREATE TABLE/CREATE INDEX do metadata compilados uma única vez para SQLite.
+    Reexecutar as strings numa conexão nova evita percorrer o metadata e
+    recompilar o DDL a cada banco em memória criado pelos testes.
     """
-    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    from sqlalchemy.dialects import sqlite
+    from sqlalchemy.schema import CreateIndex, CreateTable
 
     import app.database
     import app.models.follower  # noqa: F401 — registra o modelo no metadata
 
-    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
-    async with engine.begin() as conn:
-        await conn.run_sync(app.database.Base.metadata.create_all)
+    dialect = sqlite.dialect()
+    ddl = []
+    for table in app.database.Base.metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=dialect)))
+        ddl.extend(str(CreateIndex(index).compile(dialect=dialect)) for index in table.indexes)
+    return tuple(ddl)
+
+
+async def create_schema(conn) -> None:
+    """Cria o schema numa conexão assíncrona nova a partir do DDL pré-compilado."""
+    for statement in schema_ddl():
+        await conn.exec_driver_sql(statement)
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def db_engine():
+    """
+    Engine SQLite em memória com o schema criado uma única vez por sessão de testes,
+    compartilhada pelos testes de banco (test_database.py, test_follwer.py).
+    O isolamento entre testes vem de db_connection, não de uma engine nova por teste.
+    """
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
 
-    factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    # O driver sqlite emite o próprio BEGIN e atrapalha os SAVEPOINTs usados no
+    # isolamento: desliga o BEGIN do driver e deixa o SQLAlchemy emiti-lo
+    # (receita da documentação do dialeto aiosqlite).
+    @event.listens_for(engine.sync_engine, "connect")
+    def _disable_driver_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
 
-    with patch("app.database.async_session_factory", factory):
-        yield factory
+    @event.listens_for(engine.sync_engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
 
+    async with engine.begin() as conn:
+        await create_schema(conn)
+    yield engine
     await engine.dispose()
 
 
+@pytest_asyncio.fixture(loop_scope="session")
+async def db_connection(db_engine):
+    """
+    Conexão com uma transação externa aberta durante o teste e desfeita ao final —
+    nada que o teste grave sobrevive para o próximo.
+    """
+    async with db_engine.connect() as conn:
+        transaction = await conn.begin()
+        yield conn
+        await transaction.rollback()
+
+
 @pytest.fixture
-def mock_ctx(make_create):
+def db_session_factory(db_connection):
+    """
+    Fábrica de sessões presa à transação do teste.
+    Cada sessão trabalha num SAVEPOINT: commit() libera o savepoint (o dado fica
+    visível às sessões seguintes do mesmo teste) e rollback() volta a ele.
+    """
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    return async_sessionmaker(
+        bind=db_connection,
+        join_transaction_mode="create_savepoint",
+        expire_on_commit=False,
+        class_=AsyncSession,
+    )
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def db_session(db_session_factory):
+    """Sessão isolada por teste sobre o banco compartilhado."""
+    async with db_session_factory() as session:
+        yield session
+
+
+@pytest_asyncio.fixture
+async def in_memory_db(db_engine, monkeypatch):
     """
-    Mock do Context do apkit.
-    ctx.send() é o ponto de saída de atividades — mockamos para evitar
-    requisições HTTP reais nos testes do worker e dos handlers.
+    Banco SQLite em memória para handlers e endpoints.
+    Reutiliza o banco da sessão (db_engine) em vez de criar um por teste e o
+    esvazia ao final, para que nada vaze entre testes.
+    Patcha app.database.async_session_factory para que handlers e endpoints
+    usem este banco nos testes, sem tocar em arquivos em disco.
+    Retorna a fábrica de sessões para que os testes possam semear e verificar dados.
     """
-    ctx = MagicMock()
-    ctx.activity = make_create()
-    ctx.send = AsyncMock()
-    return ctx
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    import app.database
+
+    factory = async_sessionmaker(db_engine, expire_on_commit=False, class_=AsyncSession)
+
+    monkeypatch.setattr("app.database.async_session_factory", factory)
+    yield factory
+
+    async with db_engine.begin() as conn:
+        for table in reversed(app.database.Base.metadata.sorted_tables):
+            await conn.execute(table.delete())
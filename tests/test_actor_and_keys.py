@@ -5,13 +5,16 @@ Cobre:
 - build_actor(): estrutura e campos do objeto Person gerado
 - build_actor(): URLs construídas a partir do domínio das settings
 - build_actor(): chave pública embutida no public_key
+- get_actor(): retorna sempre a mesma instância (memoizada)
 - get_keys_for_actor(): retorna ActorKey para o username correto
 - get_keys_for_actor(): retorna lista vazia para username desconhecido
+- get_keys_for_actor(): reutiliza a mesma lista pré-montada até reload_keys()
 - load_private_key(): carrega PEM do disco corretamente
 - load_public_key_pem(): carrega PEM do disco corretamente
+- load_private_key()/load_public_key_pem(): leitura em cache até reload_keys()
+- preload_keys(): aquece o cache antes do primeiro uso
 """
 
-import pytest
 from apkit.models import Person
 
 
@@ -75,6 +78,22 @@ def test_build_actor_display_name():
     assert build_actor().name == "Test Bot"
 
 
+def test_get_actor_returns_cached_instance():
+    from app.activitypub.actor import get_actor
+
+    assert get_actor() is get_actor()
+
+
+def test_get_actor_cache_clear_rebuilds():
+    from app.activitypub.actor import get_actor
+
+    first = get_actor()
+    get_actor.cache_clear()
+    second = get_actor()
+    assert second is not first
+    assert second.id == first.id
+
+
 def test_load_private_key_returns_rsa_key():
     from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
     from app.activitypub.keys import load_private_key
@@ -90,7 +109,33 @@ def test_load_public_key_pem_returns_string():
     assert pem.startswith("-----BEGIN PUBLIC KEY-----")
 
 
-@pytest.mark.asyncio
+def test_load_private_key_is_cached():
+    from app.activitypub.keys import load_private_key
+
+    assert load_private_key() is load_private_key()
+
+
+def test_reload_keys_reads_from_disk_again(monkeypatch, tmp_path):
+    from app.activitypub.keys import load_public_key_pem, reload_keys
+    from app.config import settings
+
+    load_public_key_pem()
+    rotated = tmp_path / "rotated.pem"
+    rotated.write_text("-----BEGIN PUBLIC KEY-----\nrotacionada\n")
+    monkeypatch.setattr(settings, "public_key_path", str(rotated))
+
+    reload_keys()
+    assert "rotacionada" in load_public_key_pem()
+
+
+def test_preload_keys_warms_cache():
+    from app.activitypub.keys import load_private_key, load_public_key_pem, preload_keys
+
+    preload_keys()
+    assert load_private_key.cache_info().currsize == 1
+    assert load_public_key_pem.cache_info().currsize == 1
+
+
 async def test_get_keys_for_actor_returns_key_for_bot_username():
     from apkit.server.types import ActorKey
     from app.activitypub.keys import get_keys_for_actor
@@ -101,16 +146,24 @@ async def test_get_keys_for_actor_returns_key_for_bot_username():
     assert keys[0].key_id == "https://bot.test/users/testbot#main-key"
 
 
-@pytest.mark.asyncio
 async def test_get_keys_for_actor_returns_empty_for_unknown_identifier():
     from app.activitypub.keys import get_keys_for_actor
 
     assert await get_keys_for_actor("outrobot") == []
 
 
-@pytest.mark.asyncio
 async def test_get_keys_for_actor_key_id_format():
     from app.activitypub.keys import get_keys_for_actor
 
     keys = await get_keys_for_actor("testbot")
     assert "#main-key" in keys[0].key_id
+
+
+async def test_get_keys_for_actor_reuses_prebuilt_keys_until_reload():
+    from app.activitypub.keys import get_keys_for_actor, reload_keys
+
+    first = await get_keys_for_actor("testbot")
+    assert await get_keys_for_actor("testbot") is first
+
+    reload_keys()
+    assert await get_keys_for_actor("testbot") is not first
@@ -0,0 +1,118 @@
+"""
+Testes para app/activitypub/client.py
+
+Cobre:
+- client_session(): sem cliente aberto → abre um cliente de vida curta
+- client_session(): com cliente aberto → reutiliza o cliente compartilhado
+- close_client(): fecha o cliente compartilhado e volta ao modo de vida curta
+- fetch_actor(): cacheia actors resolvidos, respeita TTL e tamanho máximo
+- fetch_actor(): não cacheia falhas de resolução
+- cached_actor(): consulta só o cache, sem requisição
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.activitypub import client as client_module
+
+
+def _mock_client_cls(fetch_result=None):
+    instance = MagicMock()
+    instance.actor.fetch = AsyncMock(return_value=fetch_result)
+    instance.__aenter__ = AsyncMock(return_value=instance)
+    instance.__aexit__ = AsyncMock(return_value=False)
+    return MagicMock(return_value=instance), instance
+
+
+async def test_client_session_opens_short_lived_client_when_not_open():
+    mock_cls, instance = _mock_client_cls()
+
+    with patch.object(client_module, "ActivityPubClient", mock_cls):
+        async with client_module.client_session() as client:
+            assert client is instance
+
+    instance.__aexit__.assert_called_once()
+
+
+async def test_client_session_reuses_shared_client():
+    mock_cls, instance = _mock_client_cls()
+
+    with patch.object(client_module, "ActivityPubClient", mock_cls):
+        await client_module.open_client()
+        try:
+            async with client_module.client_session() as first:
+                pass
+            async with client_module.client_session() as second:
+                pass
+        finally:
+            await client_module.close_client()
+
+    assert first is second is instance
+    mock_cls.assert_called_once()
+    instance.__aexit__.assert_called_once()
+
+
+async def test_close_client_without_open_client_is_noop():
+    await client_module.close_client()
+    assert client_module._client is None
+
+
+async def test_fetch_actor_caches_resolved_actor():
+    remote_actor = MagicMock()
+    mock_cls, instance = _mock_client_cls(remote_actor)
+
+    with patch.object(client_module, "ActivityPubClient", mock_cls):
+        first = await client_module.fetch_actor("https://mastodon.social/users/fulano")
+        second = await client_module.fetch_actor("https://mastodon.social/users/fulano")
+
+    assert first is second is remote_actor
+    instance.actor.fetch.assert_awaited_once()
+
+
+async def test_fetch_actor_refetches_after_ttl(monkeypatch):
+    mock_cls, instance = _mock_client_cls(MagicMock())
+    monkeypatch.setattr(client_module, "ACTOR_CACHE_TTL", 0.0)
+
+    with patch.object(client_module, "ActivityPubClient", mock_cls):
+        await client_module.fetch_actor("https://mastodon.social/users/fulano")
+        await client_module.fetch_actor("https://mastodon.social/users/fulano")
+
+    assert instance.actor.fetch.await_count == 2
+
+
+async def test_fetch_actor_does_not_cache_failures():
+    mock_cls, instance = _mock_client_cls(None)
+
+    with patch.object(client_module, "ActivityPubClient", mock_cls):
+        assert await client_module.fetch_actor("https://mastodon.social/users/x") is None
+        assert await client_module.fetch_actor("https://mastodon.social/users/x") is None
+
+    assert instance.actor.fetch.await_count == 2
+
+
+async def test_fetch_actor_evicts_least_recently_used(monkeypatch):
+    mock_cls, _ = _mock_client_cls(MagicMock())
+    monkeypatch.setattr(client_module, "ACTOR_CACHE_MAX", 2)
+
+    with patch.object(client_module, "ActivityPubClient", mock_cls):
+        await client_module.fetch_actor("https://a.example/users/a")
+        await client_module.fetch_actor("https://b.example/users/b")
+        await client_module.fetch_actor("https://a.example/users/a")  # a volta a ser recente
+        await client_module.fetch_actor("https://c.example/users/c")
+
+    assert list(client_module._actor_cache) == [
+        "https://a.example/users/a",
+        "https://c.example/users/c",
+    ]
+
+
+async def test_cached_actor_reads_only_the_cache():
+    remote_actor = MagicMock()
+    mock_cls, instance = _mock_client_cls(remote_actor)
+    url = "https://mastodon.social/users/fulano"
+
+    assert client_module.cached_actor(url) is None
+    with patch.object(client_module, "ActivityPubClient", mock_cls):
+        await client_module.fetch_actor(url)
+
+    assert client_module.cached_actor(url) is remote_actor
+    instance.actor.fetch.assert_awaited_once()
@@ -3,48 +3,32 @@ Testes para app/database.py
 
 Cobre:
 - engine é criada com a URL correta
+- PRAGMAs de desempenho (WAL, synchronous=NORMAL) aplicados em cada conexão
+- pool explícito apenas para bancos em arquivo
 - async_session_factory retorna sessões AsyncSession
-- get_session fornece sessão funcional e faz commit automático
+- get_session_factory fornece a fábrica padrão (dependência injetável)
+- get_session fornece sessão funcional sem abrir transação
+- get_session persiste o que for commitado explicitamente
 - get_session faz rollback em caso de exceção
-- init_db cria as tabelas no banco
-- init_db importa os modelos antes de criar as tabelas
+- init_db cria as tabelas no banco (modelos importados) e é idempotente
 """
 
-from unittest.mock import patch
-
 import pytest
-import pytest_asyncio
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
+from app.database import get_session
+from app.models.follower import Follower
+
 
 # ---------------------------------------------------------------------------
-# Fixture: banco em memória isolado por teste
+# Fixture: banco em memória compartilhado, isolado por teste via SAVEPOINT
 # ---------------------------------------------------------------------------
 
 
-@pytest_asyncio.fixture
-async def test_engine():
-    """Engine SQLite em memória — isolada por teste, sem tocar em arquivos."""
-    from sqlalchemy.ext.asyncio import create_async_engine
-    from app.database import Base
-
-    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    yield engine
-    await engine.dispose()
-
-
-@pytest_asyncio.fixture
-async def test_session_factory(test_engine):
-    """Fábrica de sessões apontando para o banco em memória."""
-    from sqlalchemy.ext.asyncio import async_sessionmaker
-
-    return async_sessionmaker(
-        bind=test_engine,
-        expire_on_commit=False,
-        class_=AsyncSession,
-    )
+@pytest.fixture
+def test_session_factory(db_session_factory):
+    """Fábrica de sessões apontando para o banco em memória (ver conftest)."""
+    return db_session_factory
 
 
 # ---------------------------------------------------------------------------
@@ -67,6 +51,28 @@ def test_engine_uses_configured_url():
     assert str(engine.url) == settings.database_url
 
 
+def test_sqlite_pragmas_are_applied_on_connect(tmp_path):
+    """O listener de connect deve ativar WAL e synchronous=NORMAL."""
+    import sqlite3
+
+    from app.database import _set_sqlite_pragmas
+
+    conn = sqlite3.connect(tmp_path / "pragmas.db")
+    try:
+        _set_sqlite_pragmas(conn, None)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    finally:
+        conn.close()
+
+
+def test_engine_options_pool_only_for_file_databases():
+    from app.database import _engine_options
+
+    assert _engine_options("sqlite+aiosqlite:///./bot.db") == {"pool_size": 5, "max_overflow": 10}
+    assert _engine_options("sqlite+aiosqlite:///:memory:") == {}
+
+
 # ---------------------------------------------------------------------------
 # async_session_factory
 # ---------------------------------------------------------------------------
@@ -79,7 +85,6 @@ def test_async_session_factory_is_sessionmaker():
     assert isinstance(async_session_factory, async_sessionmaker)
 
 
-@pytest.mark.asyncio
 async def test_async_session_factory_produces_async_session(test_session_factory):
     """Sessão produzida pela fábrica deve ser AsyncSession."""
     async with test_session_factory() as session:
@@ -91,68 +96,63 @@ async def test_async_session_factory_produces_async_session(test_session_factory
 # ---------------------------------------------------------------------------
 
 
-@pytest.mark.asyncio
 async def test_get_session_yields_async_session(test_session_factory):
     """get_session deve fornecer uma sessão AsyncSession."""
-    from app.database import get_session
-
-    with patch("app.database.async_session_factory", test_session_factory):
-        gen = get_session()
-        session = await gen.__anext__()
-        assert isinstance(session, AsyncSession)
-        try:
-            await gen.aclose()
-        except StopAsyncIteration:
-            pass
-
-
-@pytest.mark.asyncio
-async def test_get_session_commits_on_success(test_engine, test_session_factory):
-    """get_session deve fazer commit automaticamente ao sair sem exceção."""
-    from app.database import Base
-    from app.models.follower import Follower
-
-    async with test_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-
-    # simula o comportamento do get_session diretamente
-    async with test_session_factory() as session:
-        async with session.begin():
-            follower = Follower(
-                actor_url="https://mastodon.social/users/fulano",
-                inbox_url="https://mastodon.social/users/fulano/inbox",
-            )
-            session.add(follower)
-    # sair do `session.begin()` faz commit automático
+    gen = get_session(factory=test_session_factory)
+    session = await gen.__anext__()
+    assert isinstance(session, AsyncSession)
+    try:
+        await gen.aclose()
+    except StopAsyncIteration:
+        pass
+
+
+def test_get_session_factory_returns_module_factory():
+    """A dependência get_session_factory deve fornecer async_session_factory."""
+    from app.database import async_session_factory, get_session_factory
+
+    assert get_session_factory() is async_session_factory
+
+
+async def test_get_session_does_not_begin_transaction(test_session_factory):
+    """get_session não deve abrir transação — rotas de leitura não pagam BEGIN/COMMIT."""
+    gen = get_session(factory=test_session_factory)
+    session = await gen.__anext__()
+    assert not session.in_transaction()
+    await gen.aclose()
+
+
+async def test_get_session_persists_explicit_commit(test_session_factory):
+    """O que for commitado explicitamente na sessão de get_session deve persistir."""
+    gen = get_session(factory=test_session_factory)
+    session = await gen.__anext__()
+    session.add(
+        Follower(
+            actor_url="https://mastodon.social/users/fulano",
+            inbox_url="https://mastodon.social/users/fulano/inbox",
+        )
+    )
+    await session.commit()
+    await gen.aclose()
 
     async with test_session_factory() as verify_session:
         result = await verify_session.get(Follower, "https://mastodon.social/users/fulano")
         assert result is not None
 
 
-@pytest.mark.asyncio
-async def test_get_session_rollback_on_exception(test_engine, test_session_factory):
+async def test_get_session_rollback_on_exception(test_session_factory):
     """get_session deve fazer rollback quando uma exceção ocorre."""
-    from app.database import get_session
-    from app.models.follower import Follower
-
-    async with test_engine.begin() as conn:
-        from app.database import Base
-
-        await conn.run_sync(Base.metadata.create_all)
-
-    with patch("app.database.async_session_factory", test_session_factory):
-        try:
-            gen = get_session()
-            session = await gen.__anext__()
-            follower = Follower(
-                actor_url="https://mastodon.social/users/fulano",
-                inbox_url="https://mastodon.social/users/fulano/inbox",
-            )
-            session.add(follower)
-            await gen.athrow(RuntimeError("erro simulado"))
-        except (RuntimeError, StopAsyncIteration):
-            pass
+    try:
+        gen = get_session(factory=test_session_factory)
+        session = await gen.__anext__()
+        follower = Follower(
+            actor_url="https://mastodon.social/users/fulano",
+            inbox_url="https://mastodon.social/users/fulano/inbox",
+        )
+        session.add(follower)
+        await gen.athrow(RuntimeError("erro simulado"))
+    except (RuntimeError, StopAsyncIteration):
+        pass
 
     # Verifica que o dado NÃO foi persistido
     async with test_session_factory() as verify_session:
@@ -165,57 +165,23 @@ async def test_get_session_rollback_on_exception(test_engine, test_session_facto
 # ---------------------------------------------------------------------------
 
 
-@pytest.mark.asyncio
-async def test_init_db_creates_tables():
-    """init_db deve criar as tabelas no banco."""
-    from sqlalchemy.ext.asyncio import create_async_engine
+async def test_init_db_creates_tables_idempotently():
+    """
+    init_db deve criar as tabelas (inclusive followers, registrada pelo import
+    do modelo dentro de init_db) e pode ser chamado de novo sem erro.
+    """
     from sqlalchemy import inspect
-
-    test_engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
-
-    with patch("app.database.engine", test_engine):
-        from app.database import init_db
-
-        await init_db()
-
-    async with test_engine.connect() as conn:
-        tables = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
-    assert "followers" in tables
-
-    await test_engine.dispose()
-
-
-@pytest.mark.asyncio
-async def test_init_db_imports_follower_model():
-    """init_db deve importar o módulo follower para registrar o modelo no metadata."""
     from sqlalchemy.ext.asyncio import create_async_engine
 
-    test_engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
-
-    with (
-        patch("app.database.engine", test_engine),
-        patch("app.models.follower"),
-    ):
-        from app.database import init_db
-
-        await init_db()
-
-    await test_engine.dispose()
-    # O simples fato de init_db completar sem erro confirma o import
-    # (se o modelo não fosse importado, a tabela não seria criada)
-
-
-@pytest.mark.asyncio
-async def test_init_db_is_idempotent():
-    """Chamar init_db duas vezes não deve causar erro (tabelas já existentes)."""
-    from sqlalchemy.ext.asyncio import create_async_engine
+    from app.database import init_db
 
     test_engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
-
-    with patch("app.database.engine", test_engine):
-        from app.database import init_db
-
-        await init_db()
-        await init_db()  # segunda chamada não deve lançar exceção
-
-    await test_engine.dispose()
+    try:
+        await init_db(bind=test_engine)
+        await init_db(bind=test_engine)  # segunda chamada não deve lançar exceção
+
+        async with test_engine.connect() as conn:
+            tables = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+        assert "followers" in tables
+    finally:
+        await test_engine.dispose()
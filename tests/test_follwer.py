@@ -4,20 +4,30 @@ Testes para app/models/follower.py
 Cobre:
 - Follower pode ser criado e persistido com campos obrigatórios
 - actor_url é a chave primária
-- inbox_url é persistido corretamente
+- inbox_url é persistido corretamente (INSERT em lote via executemany)
 - followed_at é preenchido automaticamente no INSERT
 - followed_at tem timezone UTC
 - __repr__ retorna string legível
 - actor_url duplicado levanta erro de integridade
 - merge evita erro de duplicidade (comportamento usado no on_follow)
+- create_all cria os índices de inbox_url e followed_at
 """
 
+import sys
 from datetime import datetime, timezone
+from typing import Final
 
 import pytest
 import pytest_asyncio
+from sqlalchemy import insert, inspect, select, update
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.models.follower import Follower
+
+ACTOR_URL: Final = sys.intern("https://mastodon.social/users/fulano")
+INBOX_URL: Final = sys.intern("https://mastodon.social/users/fulano/inbox")
+INBOX_URL_2: Final = sys.intern("https://mastodon.social/users/fulano/inbox2")
+INBOX_URL_NEW: Final = sys.intern("https://mastodon.social/users/fulano/inbox_novo")
 
 
 # ---------------------------------------------------------------------------
@@ -25,26 +35,34 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 # ---------------------------------------------------------------------------
 
 
-@pytest_asyncio.fixture
-async def engine():
-    from app.database import Base
+@pytest.fixture
+def session_factory(db_session_factory):
+    return db_session_factory
 
-    eng = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
-    async with eng.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    yield eng
-    await eng.dispose()
 
+@pytest.fixture
+def session(db_session):
+    return db_session
 
-@pytest_asyncio.fixture
-async def session_factory(engine):
-    return async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+
+# Followers semeados num único INSERT parametrizado (executemany),
+# sem uma passada de unit-of-work por linha
+SEED_ROWS = [
+    {
+        "actor_url": ACTOR_URL,
+        "inbox_url": INBOX_URL,
+    },
+    {
+        "actor_url": "https://fosstodon.org/users/ciclano",
+        "inbox_url": "https://fosstodon.org/users/ciclano/inbox",
+    },
+]
 
 
 @pytest_asyncio.fixture
-async def session(session_factory):
-    async with session_factory() as s:
-        yield s
+async def seeded_session(session):
+    await session.execute(insert(Follower), SEED_ROWS)
+    return session
 
 
 # ---------------------------------------------------------------------------
@@ -53,32 +71,21 @@ async def session(session_factory):
 
 
 def test_follower_tablename():
-    from app.models.follower import Follower
-
     assert Follower.__tablename__ == "followers"
 
 
 def test_follower_primary_key_is_actor_url():
-    from app.models.follower import Follower
-    from sqlalchemy import inspect
-
     mapper = inspect(Follower)
     pk_cols = [col.key for col in mapper.primary_key]
     assert pk_cols == ["actor_url"]
 
 
 def test_follower_has_inbox_url_column():
-    from app.models.follower import Follower
-    from sqlalchemy import inspect
-
     mapper = inspect(Follower)
     assert "inbox_url" in [col.key for col in mapper.columns]
 
 
 def test_follower_has_followed_at_column():
-    from app.models.follower import Follower
-    from sqlalchemy import inspect
-
     mapper = inspect(Follower)
     assert "followed_at" in [col.key for col in mapper.columns]
 
@@ -88,49 +95,26 @@ def test_follower_has_followed_at_column():
 # ---------------------------------------------------------------------------
 
 
-@pytest.mark.asyncio
 async def test_follower_can_be_saved(session):
-    from app.models.follower import Follower
-
     follower = Follower(
-        actor_url="https://mastodon.social/users/fulano",
-        inbox_url="https://mastodon.social/users/fulano/inbox",
+        actor_url=ACTOR_URL,
+        inbox_url=INBOX_URL,
     )
     session.add(follower)
     await session.commit()
 
-    result = await session.get(Follower, "https://mastodon.social/users/fulano")
+    result = await session.get(Follower, ACTOR_URL)
     assert result is not None
 
 
-@pytest.mark.asyncio
-async def test_follower_actor_url_persisted(session):
-    from app.models.follower import Follower
+async def test_follower_actor_url_persisted(seeded_session):
+    result = await seeded_session.get(Follower, ACTOR_URL)
+    assert result.actor_url == ACTOR_URL
 
-    follower = Follower(
-        actor_url="https://mastodon.social/users/fulano",
-        inbox_url="https://mastodon.social/users/fulano/inbox",
-    )
-    session.add(follower)
-    await session.commit()
-
-    result = await session.get(Follower, "https://mastodon.social/users/fulano")
-    assert result.actor_url == "https://mastodon.social/users/fulano"
-
-
-@pytest.mark.asyncio
-async def test_follower_inbox_url_persisted(session):
-    from app.models.follower import Follower
-
-    follower = Follower(
-        actor_url="https://mastodon.social/users/fulano",
-        inbox_url="https://mastodon.social/users/fulano/inbox",
-    )
-    session.add(follower)
-    await session.commit()
 
-    result = await session.get(Follower, "https://mastodon.social/users/fulano")
-    assert result.inbox_url == "https://mastodon.social/users/fulano/inbox"
+async def test_follower_inbox_url_persisted(seeded_session):
+    result = await seeded_session.get(Follower, ACTOR_URL)
+    assert result.inbox_url == INBOX_URL
 
 
 # ---------------------------------------------------------------------------
@@ -138,35 +122,17 @@ async def test_follower_inbox_url_persisted(session):
 # ---------------------------------------------------------------------------
 
 
-@pytest.mark.asyncio
-async def test_follower_followed_at_set_automatically(session):
+async def test_follower_followed_at_set_automatically(seeded_session):
     """followed_at deve ser preenchido automaticamente no INSERT."""
-    from app.models.follower import Follower
-
-    follower = Follower(
-        actor_url="https://mastodon.social/users/fulano",
-        inbox_url="https://mastodon.social/users/fulano/inbox",
-    )
-    session.add(follower)
-    await session.commit()
-    await session.refresh(follower)
-
-    assert follower.followed_at is not None
-    assert isinstance(follower.followed_at, datetime)
+    for row in SEED_ROWS:
+        follower = await seeded_session.get(Follower, row["actor_url"])
+        assert follower.followed_at is not None
+        assert isinstance(follower.followed_at, datetime)
 
 
-@pytest.mark.asyncio
-async def test_follower_followed_at_is_utc(session):
+async def test_follower_followed_at_is_utc(seeded_session):
     """followed_at deve ter timezone UTC."""
-    from app.models.follower import Follower
-
-    follower = Follower(
-        actor_url="https://mastodon.social/users/fulano",
-        inbox_url="https://mastodon.social/users/fulano/inbox",
-    )
-    session.add(follower)
-    await session.commit()
-    await session.refresh(follower)
+    follower = await seeded_session.get(Follower, ACTOR_URL)
 
     # SQLite retorna datetime sem tzinfo — verificamos que o valor é razoável
     # (dentro dos últimos 5 segundos)
@@ -175,26 +141,27 @@ async def test_follower_followed_at_is_utc(session):
     assert diff < 5
 
 
-@pytest.mark.asyncio
 async def test_follower_followed_at_not_overwritten_on_update(session):
     """followed_at não deve mudar ao atualizar inbox_url."""
-    from app.models.follower import Follower
-
-    follower = Follower(
-        actor_url="https://mastodon.social/users/fulano",
-        inbox_url="https://mastodon.social/users/fulano/inbox",
+    # RETURNING devolve followed_at no próprio INSERT/UPDATE, sem o SELECT extra do refresh()
+    insert_stmt = (
+        insert(Follower)
+        .values(actor_url=ACTOR_URL, inbox_url=INBOX_URL)
+        .returning(Follower.followed_at)
     )
-    session.add(follower)
+    original_followed_at = (await session.execute(insert_stmt)).scalar_one()
     await session.commit()
-    await session.refresh(follower)
-
-    original_followed_at = follower.followed_at
 
-    follower.inbox_url = "https://mastodon.social/users/fulano/inbox2"
+    update_stmt = (
+        update(Follower)
+        .where(Follower.actor_url == ACTOR_URL)
+        .values(inbox_url=INBOX_URL_2)
+        .returning(Follower.followed_at)
+    )
+    followed_at = (await session.execute(update_stmt)).scalar_one()
     await session.commit()
-    await session.refresh(follower)
 
-    assert follower.followed_at == original_followed_at
+    assert followed_at == original_followed_at
 
 
 # ---------------------------------------------------------------------------
@@ -203,13 +170,11 @@ async def test_follower_followed_at_not_overwritten_on_update(session):
 
 
 def test_follower_repr():
-    from app.models.follower import Follower
-
     follower = Follower(
-        actor_url="https://mastodon.social/users/fulano",
-        inbox_url="https://mastodon.social/users/fulano/inbox",
+        actor_url=ACTOR_URL,
+        inbox_url=INBOX_URL,
     )
-    assert "https://mastodon.social/users/fulano" in repr(follower)
+    assert ACTOR_URL in repr(follower)
     assert "Follower" in repr(follower)
 
 
@@ -218,54 +183,44 @@ def test_follower_repr():
 # ---------------------------------------------------------------------------
 
 
-@pytest.mark.asyncio
-async def test_follower_duplicate_actor_url_raises(session_factory):
+async def test_follower_duplicate_actor_url_raises(db_connection, session_factory):
     """INSERT duplicado deve levantar IntegrityError."""
-    from app.models.follower import Follower
-
-    async with session_factory() as s1:
-        s1.add(
-            Follower(
-                actor_url="https://mastodon.social/users/fulano",
-                inbox_url="https://mastodon.social/users/fulano/inbox",
-            )
-        )
-        await s1.commit()
+    # Semeadura é só preparação: INSERT Core direto na conexão, sem sessão ORM
+    await db_connection.execute(insert(Follower), {"actor_url": ACTOR_URL, "inbox_url": INBOX_URL})
 
-    async with session_factory() as s2:
-        s2.add(
+    async with session_factory() as session:
+        session.add(
             Follower(
-                actor_url="https://mastodon.social/users/fulano",
-                inbox_url="https://mastodon.social/users/fulano/inbox",
+                actor_url=ACTOR_URL,
+                inbox_url=INBOX_URL,
             )
         )
         with pytest.raises(IntegrityError):
-            await s2.commit()
+            await session.commit()
 
 
-@pytest.mark.asyncio
-async def test_follower_merge_avoids_duplicate(session_factory):
+async def test_follower_merge_avoids_duplicate(db_connection, session_factory):
     """session.merge deve atualizar sem erro em caso de actor_url duplicado."""
-    from app.models.follower import Follower
+    await db_connection.execute(insert(Follower), {"actor_url": ACTOR_URL, "inbox_url": INBOX_URL})
 
-    async with session_factory() as s1:
-        await s1.merge(
+    async with session_factory() as session:
+        await session.merge(
             Follower(
-                actor_url="https://mastodon.social/users/fulano",
-                inbox_url="https://mastodon.social/users/fulano/inbox",
+                actor_url=ACTOR_URL,
+                inbox_url=INBOX_URL_NEW,
             )
         )
-        await s1.commit()
+        await session.commit()
 
-    async with session_factory() as s2:
-        await s2.merge(
-            Follower(
-                actor_url="https://mastodon.social/users/fulano",
-                inbox_url="https://mastodon.social/users/fulano/inbox_novo",
-            )
-        )
-        await s2.commit()
+    inbox_url = await db_connection.scalar(
+        select(Follower.inbox_url).where(Follower.actor_url == ACTOR_URL)
+    )
+    assert inbox_url == INBOX_URL_NEW
+
+
+async def test_follower_indexes_are_created(db_connection):
+    indexes = await db_connection.run_sync(lambda c: inspect(c).get_indexes("followers"))
 
-    async with session_factory() as s3:
-        result = await s3.get(Follower, "https://mastodon.social/users/fulano")
-        assert result.inbox_url == "https://mastodon.social/users/fulano/inbox_novo"
+    by_name = {ix["name"]: ix["column_names"] for ix in indexes}
+    assert by_name["ix_followers_inbox_url"] == ["inbox_url"]
+    assert by_name["ix_followers_followed_at"] == ["followed_at"]
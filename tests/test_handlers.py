@@ -5,12 +5,16 @@ Cobre:
 - on_follow: actor remoto como string → busca e aceita
 - on_follow: actor remoto já como objeto APKitActor → aceita diretamente
 - on_follow: actor não resolúvel → retorna 400
+- build_accept: Accept com id derivado do Follow e actor do bot
 - on_create: enfileira ctx.activity (não ctx) e retorna 202
 - on_create: translate_text não é chamado diretamente
+- on_create: fila cheia → aguarda uma vaga e enfileira quando ela surge
+- on_create: fila cheia além de INBOX_PUT_TIMEOUT → retorna 429
 """
 
 import asyncio
-from unittest.mock import AsyncMock, MagicMock, patch
+from dataclasses import dataclass, field
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from apkit.models import Create, Follow, Note
@@ -18,45 +22,73 @@ from fastapi import Response
 from fastapi.responses import JSONResponse
 
 
-def _make_follow_ctx(actor_value, bot_actor_url="https://bot.test/users/testbot"):
-    activity = Follow(
-        id="https://mastodon.social/users/fulano#follows/1",
-        actor=actor_value,
-        object=bot_actor_url,
-    )
-    ctx = MagicMock()
-    ctx.activity = activity
-    ctx.send = AsyncMock()
-    return ctx
+@dataclass(slots=True)
+class FakeCtx:
+    """Substituto leve do Context do apkit: guarda a atividade e registra os envios."""
+
+    activity: object
+    sent: list = field(default_factory=list)
+
+    async def send(self, *args, **kwargs):
+        self.sent.append((args, kwargs))
+
+
+# Atividades montadas (e validadas) uma única vez. Os handlers só as leem,
+# então todos os testes podem compartilhar as mesmas instâncias.
+_PUBLIC = "https://www.w3.org/ns/activitystreams#Public"
+
+_FOLLOW = Follow(
+    id="https://mastodon.social/users/fulano#follows/1",
+    actor="https://mastodon.social/users/fulano",
+    object="https://bot.test/users/testbot",
+)
+_NOTE = Note(
+    id="https://mastodon.social/statuses/1",
+    attributed_to="https://mastodon.social/users/fulano",
+    content="<p>Olá</p>",
+    to=[_PUBLIC],
+)
+_CREATE = Create(
+    id="https://mastodon.social/statuses/1/activity",
+    actor="https://mastodon.social/users/fulano",
+    object=_NOTE,
+    to=[_PUBLIC],
+)
+
+
+def _make_follow_ctx(actor_value):
+    if actor_value == _FOLLOW.actor:
+        return FakeCtx(activity=_FOLLOW)
+    # model_copy não revalida: aceita também um actor já resolvido (mock de APKitActor)
+    return FakeCtx(activity=_FOLLOW.model_copy(update={"actor": actor_value}))
 
 
 def _make_create_ctx():
-    note = Note(
-        id="https://mastodon.social/statuses/1",
-        attributed_to="https://mastodon.social/users/fulano",
-        content="<p>Olá</p>",
-        to=["https://www.w3.org/ns/activitystreams#Public"],
-    )
-    activity = Create(
-        id="https://mastodon.social/statuses/1/activity",
-        actor="https://mastodon.social/users/fulano",
-        object=note,
-        to=["https://www.w3.org/ns/activitystreams#Public"],
-    )
-    ctx = MagicMock()
-    ctx.activity = activity
-    ctx.send = AsyncMock()
-    return ctx
+    return FakeCtx(activity=_CREATE)
+
+
+def _mock_ap_client_cls(fetch_result):
+    """Substituto de ActivityPubClient cujo actor.fetch resolve para `fetch_result`."""
+    instance = AsyncMock()
+    instance.__aenter__ = AsyncMock(return_value=instance)
+    instance.__aexit__ = AsyncMock(return_value=False)
+    instance.actor.fetch = AsyncMock(return_value=fetch_result)
+    return MagicMock(return_value=instance)
 
 
-def _get_handlers():
-    """Registra os handlers num app fake e retorna o dicionário {tipo: fn}."""
-    handlers = {}
+@pytest.fixture(scope="session")
+def handlers():
+    """
+    Registra os handlers num app fake uma única vez e retorna o dicionário {tipo: fn}.
+    Os handlers leem fila, banco e cliente dos módulos na hora da chamada,
+    então os patches feitos em cada teste continuam valendo.
+    """
+    registered = {}
 
     class FakeApp:
         def on(self, activity_type):
             def decorator(fn):
-                handlers[activity_type.__name__] = fn
+                registered[activity_type.__name__] = fn
                 return fn
 
             return decorator
@@ -64,81 +96,81 @@ def _get_handlers():
     from app.activitypub import handlers as handlers_module
 
     handlers_module.register_handlers(FakeApp())
-    return handlers
+    return registered
 
 
-@pytest.mark.asyncio
-async def test_on_follow_with_actor_as_string_accepts_and_replies(in_memory_db):
+async def test_on_follow_with_actor_as_string_accepts_and_replies(
+    in_memory_db, handlers, monkeypatch
+):
     from apkit.models import Actor as APKitActor
 
     mock_follower = MagicMock(spec=APKitActor)
     mock_follower.id = "https://mastodon.social/users/fulano"
     mock_follower.inbox = "https://mastodon.social/users/fulano/inbox"
     ctx = _make_follow_ctx("https://mastodon.social/users/fulano")
+    monkeypatch.setattr(
+        "app.activitypub.client.ActivityPubClient", _mock_ap_client_cls(mock_follower)
+    )
 
-    with patch("app.activitypub.handlers.ActivityPubClient") as mock_ap_client:
-        mock_client_instance = AsyncMock()
-        mock_client_instance.__aenter__ = AsyncMock(return_value=mock_client_instance)
-        mock_client_instance.__aexit__ = AsyncMock(return_value=False)
-        mock_client_instance.actor.fetch = AsyncMock(return_value=mock_follower)
-        mock_ap_client.return_value = mock_client_instance
-
-        handlers = _get_handlers()
-        response = await handlers["Follow"](ctx)
+    response = await handlers["Follow"](ctx)
 
-    ctx.send.assert_called_once()
+    assert len(ctx.sent) == 1
     assert isinstance(response, Response)
     assert response.status_code == 202
 
 
-@pytest.mark.asyncio
-async def test_on_follow_with_actor_as_object_skips_fetch(in_memory_db):
+async def test_on_follow_with_actor_as_object_skips_fetch(in_memory_db, handlers, monkeypatch):
     from apkit.models import Actor as APKitActor
 
     mock_follower = MagicMock(spec=APKitActor)
     mock_follower.id = "https://mastodon.social/users/fulano"
     mock_follower.inbox = "https://mastodon.social/users/fulano/inbox"
     ctx = _make_follow_ctx(mock_follower)
+    mock_ap_client = MagicMock()
+    monkeypatch.setattr("app.activitypub.client.ActivityPubClient", mock_ap_client)
 
-    with patch("app.activitypub.handlers.ActivityPubClient") as mock_ap_client:
-        handlers = _get_handlers()
-        response = await handlers["Follow"](ctx)
+    response = await handlers["Follow"](ctx)
 
     mock_ap_client.assert_not_called()
-    ctx.send.assert_called_once()
+    assert len(ctx.sent) == 1
     assert response.status_code == 202
 
 
-@pytest.mark.asyncio
-async def test_on_follow_returns_400_when_actor_not_resolved():
+async def test_on_follow_returns_400_when_actor_not_resolved(handlers, monkeypatch):
     ctx = _make_follow_ctx("https://mastodon.social/users/fantasma")
+    monkeypatch.setattr("app.activitypub.client.ActivityPubClient", _mock_ap_client_cls(None))
 
-    with patch("app.activitypub.handlers.ActivityPubClient") as mock_ap_client:
-        mock_client_instance = AsyncMock()
-        mock_client_instance.__aenter__ = AsyncMock(return_value=mock_client_instance)
-        mock_client_instance.__aexit__ = AsyncMock(return_value=False)
-        mock_client_instance.actor.fetch = AsyncMock(return_value=None)
-        mock_ap_client.return_value = mock_client_instance
-
-        handlers = _get_handlers()
-        response = await handlers["Follow"](ctx)
+    response = await handlers["Follow"](ctx)
 
-    ctx.send.assert_not_called()
+    assert ctx.sent == []
     assert isinstance(response, JSONResponse)
     assert response.status_code == 400
 
 
-@pytest.mark.asyncio
-async def test_on_create_enqueues_activity_not_ctx_and_returns_202():
+def test_build_accept_uses_bot_actor_and_follow():
+    from apkit.models import Accept
+
+    from app.activitypub.handlers import build_accept
+
+    follow = _make_follow_ctx("https://mastodon.social/users/fulano").activity
+    accept = build_accept(follow)
+
+    assert isinstance(accept, Accept)
+    assert accept.type == "Accept"
+    assert accept.actor == "https://bot.test/users/testbot"
+    assert accept.id == f"https://bot.test/users/testbot#accept/{follow.id}"
+    assert accept.object.id == follow.id
+
+
+async def test_on_create_enqueues_activity_not_ctx_and_returns_202(handlers, monkeypatch):
     """Verifica que ctx.activity é enfileirado, não o ctx inteiro."""
     test_queue: asyncio.Queue = asyncio.Queue()
     ctx = _make_create_ctx()
 
     from app.services import queue as queue_module
 
-    with patch.object(queue_module, "activity_queue", test_queue):
-        handlers = _get_handlers()
-        response = await handlers["Create"](ctx)
+    monkeypatch.setattr(queue_module, "activity_queue", test_queue)
+    response = await handlers["Create"](ctx)
 
     assert response.status_code == 202
     assert not test_queue.empty()
@@ -148,43 +180,69 @@ async def test_on_create_enqueues_activity_not_ctx_and_returns_202():
     assert isinstance(queued_item, Create)
 
 
-@pytest.mark.asyncio
-async def test_on_create_does_not_call_translate():
+async def test_on_create_does_not_call_translate(handlers, monkeypatch):
     test_queue: asyncio.Queue = asyncio.Queue()
     ctx = _make_create_ctx()
+    mock_translate = AsyncMock()
 
     from app.services import queue as queue_module
 
-    with (
-        patch.object(queue_module, "activity_queue", test_queue),
-        patch("app.services.translate.translate_text") as mock_translate,
-    ):
-        handlers = _get_handlers()
-        await handlers["Create"](ctx)
+    monkeypatch.setattr(queue_module, "activity_queue", test_queue)
+    monkeypatch.setattr("app.services.translate.translate_text", mock_translate)
+    await handlers["Create"](ctx)
 
     mock_translate.assert_not_called()
 
 
-@pytest.mark.asyncio
-async def test_on_follow_returns_400_when_actor_is_unknown_type():
+async def test_on_create_returns_429_when_queue_is_full(handlers, monkeypatch):
+    test_queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+    test_queue.put_nowait(object())
+    ctx = _make_create_ctx()
+
+    from app.services import queue as queue_module
+
+    monkeypatch.setattr(queue_module, "activity_queue", test_queue)
+    monkeypatch.setattr("app.activitypub.handlers.INBOX_PUT_TIMEOUT", 0.01)
+    response = await handlers["Create"](ctx)
+
+    assert response.status_code == 429
+    assert test_queue.qsize() == 1
+
+
+async def test_on_create_waits_for_room_when_queue_is_full(handlers, monkeypatch):
+    test_queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+    test_queue.put_nowait(object())
+    ctx = _make_create_ctx()
+
+    from app.services import queue as queue_module
+
+    monkeypatch.setattr(queue_module, "activity_queue", test_queue)
+    handler = asyncio.create_task(handlers["Create"](ctx))
+    await asyncio.sleep(0)
+    assert not handler.done()
+
+    test_queue.get_nowait()  # o worker libera uma vaga
+    response = await asyncio.wait_for(handler, timeout=1)
+
+    assert response.status_code == 202
+    assert test_queue.get_nowait() is ctx.activity
+
+
+async def test_on_follow_returns_400_when_actor_is_unknown_type(handlers):
     """Actor que não é string nem APKitActor → follower_actor fica None → retorna 400."""
     # Follow usa Pydantic e só aceita str|Actor, então montamos o ctx manualmente
     activity = MagicMock()
     activity.actor = object()  # nem str nem APKitActor
-    ctx = MagicMock()
-    ctx.activity = activity
-    ctx.send = AsyncMock()
+    ctx = FakeCtx(activity=activity)
 
-    handlers = _get_handlers()
     response = await handlers["Follow"](ctx)
 
-    ctx.send.assert_not_called()
+    assert ctx.sent == []
     assert isinstance(response, JSONResponse)
     assert response.status_code == 400
 
 
-@pytest.mark.asyncio
-async def test_on_follow_persists_follower_to_db(in_memory_db):
+async def test_on_follow_persists_follower_to_db(in_memory_db, handlers):
     """on_follow deve salvar o follower no banco após aceitar."""
     from apkit.models import Actor as APKitActor
 
@@ -196,7 +254,6 @@ async def test_on_follow_persists_follower_to_db(in_memory_db):
     mock_follower.inbox = "https://mastodon.social/users/fulano/inbox"
     ctx = _make_follow_ctx(mock_follower)
 
-    handlers = _get_handlers()
     await handlers["Follow"](ctx)
 
     async with in_memory_db() as session:
@@ -208,8 +265,7 @@ async def test_on_follow_persists_follower_to_db(in_memory_db):
     assert followers[0].inbox_url == "https://mastodon.social/users/fulano/inbox"
 
 
-@pytest.mark.asyncio
-async def test_on_follow_upserts_existing_follower(in_memory_db):
+async def test_on_follow_upserts_existing_follower(in_memory_db, handlers):
     """Seguir duas vezes o mesmo actor não deve duplicar o registro."""
     from apkit.models import Actor as APKitActor
 
@@ -221,7 +277,6 @@ async def test_on_follow_upserts_existing_follower(in_memory_db):
     mock_follower.inbox = "https://mastodon.social/users/fulano/inbox"
     ctx = _make_follow_ctx(mock_follower)
 
-    handlers = _get_handlers()
     await handlers["Follow"](ctx)
     await handlers["Follow"](_make_follow_ctx(mock_follower))
 
@@ -232,8 +287,33 @@ async def test_on_follow_upserts_existing_follower(in_memory_db):
     assert len(followers) == 1
 
 
-@pytest.mark.asyncio
-async def test_on_undo_removes_follower_from_db(in_memory_db):
+async def test_on_follow_upsert_updates_inbox_and_keeps_followed_at(in_memory_db, handlers):
+    """Novo Follow do mesmo actor atualiza inbox_url sem reescrever followed_at."""
+    from apkit.models import Actor as APKitActor
+
+    from app.models.follower import Follower
+
+    mock_follower = MagicMock(spec=APKitActor)
+    mock_follower.id = "https://mastodon.social/users/fulano"
+    mock_follower.inbox = "https://mastodon.social/users/fulano/inbox"
+
+    await handlers["Follow"](_make_follow_ctx(mock_follower))
+    async with in_memory_db() as session:
+        original_followed_at = (
+            await session.get(Follower, "https://mastodon.social/users/fulano")
+        ).followed_at
+
+    mock_follower.inbox = "https://mastodon.social/users/fulano/inbox_novo"
+    await handlers["Follow"](_make_follow_ctx(mock_follower))
+
+    async with in_memory_db() as session:
+        follower = await session.get(Follower, "https://mastodon.social/users/fulano")
+
+    assert follower.inbox_url == "https://mastodon.social/users/fulano/inbox_novo"
+    assert follower.followed_at == original_followed_at
+
+
+async def test_on_undo_removes_follower_from_db(in_memory_db, handlers):
     """on_undo com Undo{Follow} deve remover o follower do banco."""
     from apkit.models import Follow, Undo
 
@@ -260,10 +340,8 @@ async def test_on_undo_removes_follower_from_db(in_memory_db):
         actor="https://mastodon.social/users/fulano",
         object=follow,
     )
-    ctx = MagicMock()
-    ctx.activity = undo
+    ctx = FakeCtx(activity=undo)
 
-    handlers = _get_handlers()
     response = await handlers["Undo"](ctx)
 
     assert response.status_code == 202
@@ -275,8 +353,7 @@ async def test_on_undo_removes_follower_from_db(in_memory_db):
     assert followers == []
 
 
-@pytest.mark.asyncio
-async def test_on_undo_ignores_non_follow_activities(in_memory_db):
+async def test_on_undo_ignores_non_follow_activities(in_memory_db, handlers):
     """on_undo com objeto que não é Follow deve retornar 202 sem alterar o banco."""
     from apkit.models import Create, Note, Undo
 
@@ -308,10 +385,8 @@ async def test_on_undo_ignores_non_follow_activities(in_memory_db):
         actor="https://mastodon.social/users/fulano",
         object=create,
     )
-    ctx = MagicMock()
-    ctx.activity = undo
+    ctx = FakeCtx(activity=undo)
 
-    handlers = _get_handlers()
     response = await handlers["Undo"](ctx)
 
     assert response.status_code == 202
@@ -8,18 +8,36 @@ Cobre:
 - Activity com objeto que não é Note → ignorado
 - Idiomas de origem e destino aparecem corretamente na resposta
 - Create de resposta tem in_reply_to, tag de menção e campos obrigatórios
+- Note e Create de resposta compartilham o mesmo `published`
+- @usuário da resposta extraído do path do actor (barra final e query ignoradas)
 - sign_with=["draft-cavage"] é usado no envio
 - Erros no envio são logados mas não propagados
 - run_worker: consome activity da fila (não ctx) e continua após erro
+- run_worker: falha na tradução é logada com o erro original
+- run_worker: drena em lote as atividades já enfileiradas
+- run_worker: ocioso aguarda a fila sem timeout e termina ao ser cancelado
+- _BatchTranslator: traduções concorrentes numa só requisição, fallback individual em falha
+- Requisições a servidores remotos respeitam o limite de concorrência
+  (acertos no cache de actors não ocupam vaga)
+- Actor remoto: resolvido uma vez por autor (cache), None → erro logado sem envio
+- Tradução e busca do actor remoto rodam concorrentemente; a falha de uma cancela a outra
+- extract_plain_text: remove menções e tags, decodifica entidades HTML
+- extract_plain_text: menção com <span> aninhado não engole o texto seguinte
+- extract_plain_text: espaços em branco entre blocos colapsados em um só
 """
 
 import asyncio
-from unittest.mock import AsyncMock, MagicMock, patch
+from dataclasses import dataclass
+from typing import Any
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
 
 import pytest
 from apkit.models import Create, Note
 from apkit.types import ActorKey
-from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.activitypub import client as client_module
+import workers.inbox_worker as worker_module
+from workers.inbox_worker import extract_plain_text, handle_create, run_worker
 
 
 # ---------------------------------------------------------------------------
@@ -27,17 +45,23 @@ from cryptography.hazmat.primitives.asymmetric import rsa
 # ---------------------------------------------------------------------------
 
 
-def _make_rsa_key():
-    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
-
-
-def _make_actor_key():
+@pytest.fixture(scope="session")
+def actor_key(rsa_private_key):
+    """ActorKey do bot sobre o par RSA da sessão (conftest) — gerado uma única vez."""
     return ActorKey(
         key_id="https://bot.test/users/testbot#main-key",
-        private_key=_make_rsa_key(),
+        private_key=rsa_private_key,
     )
 
 
+@dataclass(slots=True)
+class _FakeActivity:
+    """Stub mínimo de Create: handle_create só lê .actor e .object."""
+
+    actor: str
+    object: Any
+
+
 def _build_activity(note: Note, actor_url: str = "https://mastodon.social/users/fulano") -> Create:
     """Retorna um Create diretamente — handle_create recebe activity, não ctx."""
     return Create(
@@ -81,32 +105,60 @@ def _make_remote_actor(url: str = "https://mastodon.social/users/fulano"):
 
 def _mock_ap_client(remote_actor):
     """
-    Retorna dois mocks de ActivityPubClient — um para o actor.fetch
-    e outro para o post — já que handle_create usa dois `async with` separados.
+    Mock do ActivityPubClient compartilhado: actor.fetch resolve para
+    `remote_actor` e post devolve uma resposta 202.
     """
-    # mock da resposta HTTP do post
     mock_response = AsyncMock()
     mock_response.__aenter__ = AsyncMock(return_value=mock_response)
     mock_response.__aexit__ = AsyncMock(return_value=False)
     mock_response.status = 202
     mock_response.text = AsyncMock(return_value="")
 
-    # instância retornada pelo primeiro async with — para actor.fetch
-    mock_fetch_instance = MagicMock()
-    mock_fetch_instance.actor = MagicMock()
-    mock_fetch_instance.actor.fetch = AsyncMock(return_value=remote_actor)
-    mock_fetch_client = AsyncMock()
-    mock_fetch_client.__aenter__ = AsyncMock(return_value=mock_fetch_instance)
-    mock_fetch_client.__aexit__ = AsyncMock(return_value=False)
+    mock_client = MagicMock()
+    mock_client.actor.fetch = AsyncMock(return_value=remote_actor)
+    mock_client.post = MagicMock(return_value=mock_response)
+    return mock_client
+
+
+@pytest.fixture
+def remote_actor():
+    return _make_remote_actor()
+
+
+@pytest.fixture
+def ap_client(request, remote_actor, monkeypatch):
+    """
+    Instala _mock_ap_client como o cliente compartilhado de app.activitypub.client,
+    que client_session() fornece a fetch_actor e ao worker.
+    Com parametrização indireta "post_fails", o post levanta "connection refused".
+    """
+    mock_client = _mock_ap_client(remote_actor)
+    if getattr(request, "param", None) == "post_fails":
+        mock_client.post.side_effect = Exception("connection refused")
+    monkeypatch.setattr(client_module, "_client", mock_client)
+    return mock_client
+
+
+@pytest.fixture
+def translator():
+    """Fake de translate_text passado a handle_create(translator=...)."""
+    return AsyncMock(return_value={"translated": "Olá", "detected_source": "en"})
+
 
-    # instância retornada pelo segundo async with — para post
-    mock_post_instance = MagicMock()
-    mock_post_instance.post = MagicMock(return_value=mock_response)
-    mock_post_client = AsyncMock()
-    mock_post_client.__aenter__ = AsyncMock(return_value=mock_post_instance)
-    mock_post_client.__aexit__ = AsyncMock(return_value=False)
+@pytest.fixture
+def bot_keys(actor_key):
+    """Fake de get_bot_keys passado a handle_create(key_source=...)."""
+    return AsyncMock(return_value=[actor_key])
 
-    return mock_fetch_client, mock_post_client
+
+@pytest.fixture
+def mention_activity():
+    return _build_activity(_note_with_mention())
+
+
+@pytest.fixture
+def plain_activity():
+    return _build_activity(_note_without_mention())
 
 
 # ---------------------------------------------------------------------------
@@ -114,39 +166,23 @@ def _mock_ap_client(remote_actor):
 # ---------------------------------------------------------------------------
 
 
-@pytest.mark.asyncio
-async def test_handle_create_translates_and_calls_client_post():
+async def test_handle_create_translates_and_calls_client_post(
+    mention_activity, ap_client, bot_keys
+):
     """Tradução ocorre e ActivityPubClient.post é chamado com Create assinado."""
-    activity = _build_activity(_note_with_mention("Bonjour tout le monde"))
-    remote_actor = _make_remote_actor()
-    mock_fetch_client, mock_post_client = _mock_ap_client(remote_actor)
+    translator = AsyncMock(return_value={"translated": "Olá a todos", "detected_source": "fr"})
 
-    import workers.inbox_worker as worker_module
+    await handle_create(mention_activity, translator=translator, key_source=bot_keys)
 
-    with (
-        patch.object(
-            worker_module,
-            "translate_text",
-            AsyncMock(return_value={"translated": "Olá a todos", "detected_source": "fr"}),
-        ),
-        patch.object(
-            worker_module, "ActivityPubClient", side_effect=[mock_fetch_client, mock_post_client]
-        ),
-        patch.object(worker_module, "get_bot_keys", AsyncMock(return_value=[_make_actor_key()])),
-    ):
-        await worker_module.handle_create(activity)
-
-    mock_post_instance = mock_post_client.__aenter__.return_value
-    mock_post_instance.post.assert_called_once()
-    sent_activity = mock_post_instance.post.call_args.kwargs["json"]
+    ap_client.post.assert_called_once()
+    sent_activity = ap_client.post.call_args.kwargs["json"]
     assert isinstance(sent_activity, Create)
     assert "Olá a todos" in sent_activity.object.content
     assert "FR" in sent_activity.object.content
     assert "PT" in sent_activity.object.content
 
 
-@pytest.mark.asyncio
-async def test_handle_create_reply_has_correct_in_reply_to():
+async def test_handle_create_reply_has_correct_in_reply_to(ap_client, translator, bot_keys):
     """Note de resposta tem in_reply_to apontando para o post original."""
     original_id = "https://mastodon.social/statuses/42"
     note = Note(
@@ -156,130 +192,67 @@ async def test_handle_create_reply_has_correct_in_reply_to():
         to=["https://www.w3.org/ns/activitystreams#Public"],
     )
     activity = _build_activity(note)
-    remote_actor = _make_remote_actor()
-    mock_fetch_client, mock_post_client = _mock_ap_client(remote_actor)
 
-    import workers.inbox_worker as worker_module
+    await handle_create(activity, translator=translator, key_source=bot_keys)
 
-    with (
-        patch.object(
-            worker_module,
-            "translate_text",
-            AsyncMock(return_value={"translated": "Olá", "detected_source": "en"}),
-        ),
-        patch.object(
-            worker_module, "ActivityPubClient", side_effect=[mock_fetch_client, mock_post_client]
-        ),
-        patch.object(worker_module, "get_bot_keys", AsyncMock(return_value=[_make_actor_key()])),
-    ):
-        await worker_module.handle_create(activity)
-
-    mock_post_instance = mock_post_client.__aenter__.return_value
-    sent_note = mock_post_instance.post.call_args.kwargs["json"].object
+    sent_note = ap_client.post.call_args.kwargs["json"].object
     assert sent_note.in_reply_to.id == original_id
 
 
-@pytest.mark.asyncio
-async def test_handle_create_reply_is_public():
+async def test_handle_create_reply_is_public(mention_activity, ap_client, translator, bot_keys):
     """Note de resposta é pública: #Public em 'to' e autor em 'cc'."""
     author_url = "https://mastodon.social/users/fulano"
-    activity = _build_activity(_note_with_mention("Hello"), actor_url=author_url)
-    remote_actor = _make_remote_actor(author_url)
-    mock_fetch_client, mock_post_client = _mock_ap_client(remote_actor)
-
-    import workers.inbox_worker as worker_module
 
-    with (
-        patch.object(
-            worker_module,
-            "translate_text",
-            AsyncMock(return_value={"translated": "Olá", "detected_source": "en"}),
-        ),
-        patch.object(
-            worker_module, "ActivityPubClient", side_effect=[mock_fetch_client, mock_post_client]
-        ),
-        patch.object(worker_module, "get_bot_keys", AsyncMock(return_value=[_make_actor_key()])),
-    ):
-        await worker_module.handle_create(activity)
+    await handle_create(mention_activity, translator=translator, key_source=bot_keys)
 
-    mock_post_instance = mock_post_client.__aenter__.return_value
-    sent_note = mock_post_instance.post.call_args.kwargs["json"].object
+    sent_note = ap_client.post.call_args.kwargs["json"].object
     assert "https://www.w3.org/ns/activitystreams#Public" in sent_note.to
     assert author_url in sent_note.cc
 
 
-@pytest.mark.asyncio
-async def test_handle_create_reply_has_mention_tag():
+async def test_handle_create_note_and_create_share_published(
+    mention_activity, ap_client, translator, bot_keys
+):
+    """Note e Create de resposta levam o mesmo `published`."""
+    await handle_create(mention_activity, translator=translator, key_source=bot_keys)
+
+    sent_create = ap_client.post.call_args.kwargs["json"]
+    assert sent_create.published == sent_create.object.published
+
+
+async def test_handle_create_reply_has_mention_tag(
+    mention_activity, ap_client, translator, bot_keys
+):
     """Note de resposta tem tag de Mention com href do autor."""
     author_url = "https://mastodon.social/users/fulano"
-    activity = _build_activity(_note_with_mention("Hello"), actor_url=author_url)
-    remote_actor = _make_remote_actor(author_url)
-    mock_fetch_client, mock_post_client = _mock_ap_client(remote_actor)
 
-    import workers.inbox_worker as worker_module
+    await handle_create(mention_activity, translator=translator, key_source=bot_keys)
 
-    with (
-        patch.object(
-            worker_module,
-            "translate_text",
-            AsyncMock(return_value={"translated": "Olá", "detected_source": "en"}),
-        ),
-        patch.object(
-            worker_module, "ActivityPubClient", side_effect=[mock_fetch_client, mock_post_client]
-        ),
-        patch.object(worker_module, "get_bot_keys", AsyncMock(return_value=[_make_actor_key()])),
-    ):
-        await worker_module.handle_create(activity)
-
-    mock_post_instance = mock_post_client.__aenter__.return_value
-    sent_note = mock_post_instance.post.call_args.kwargs["json"].object
+    sent_note = ap_client.post.call_args.kwargs["json"].object
     mention_tags = [t for t in sent_note.tag if getattr(t, "type", None) == "Mention"]
     assert len(mention_tags) == 1
     assert mention_tags[0].href == author_url
 
 
-@pytest.mark.asyncio
-async def test_handle_create_uses_draft_cavage_signing():
+@pytest.mark.slow
+async def test_handle_create_uses_draft_cavage_signing(
+    mention_activity, ap_client, translator, bot_keys
+):
     """client.post é chamado com sign_with=['draft-cavage'] e signatures."""
-    activity = _build_activity(_note_with_mention("Hello"))
-    remote_actor = _make_remote_actor()
-    mock_fetch_client, mock_post_client = _mock_ap_client(remote_actor)
+    await handle_create(mention_activity, translator=translator, key_source=bot_keys)
 
-    import workers.inbox_worker as worker_module
-
-    with (
-        patch.object(
-            worker_module,
-            "translate_text",
-            AsyncMock(return_value={"translated": "Olá", "detected_source": "en"}),
-        ),
-        patch.object(
-            worker_module, "ActivityPubClient", side_effect=[mock_fetch_client, mock_post_client]
-        ),
-        patch.object(worker_module, "get_bot_keys", AsyncMock(return_value=[_make_actor_key()])),
-    ):
-        await worker_module.handle_create(activity)
-
-    mock_post_instance = mock_post_client.__aenter__.return_value
-    call_kwargs = mock_post_instance.post.call_args.kwargs
+    call_kwargs = ap_client.post.call_args.kwargs
     assert call_kwargs["sign_with"] == ["draft-cavage"]
     assert "signatures" in call_kwargs
 
 
-@pytest.mark.asyncio
-async def test_handle_create_ignores_post_without_mention():
-    activity = _build_activity(_note_without_mention())
-
-    import workers.inbox_worker as worker_module
+async def test_handle_create_ignores_post_without_mention(plain_activity, translator):
+    await handle_create(plain_activity, translator=translator)
 
-    with patch.object(worker_module, "translate_text") as mock_translate:
-        await worker_module.handle_create(activity)
+    translator.assert_not_called()
 
-    mock_translate.assert_not_called()
 
-
-@pytest.mark.asyncio
-async def test_handle_create_ignores_empty_text_after_stripping_mention():
+async def test_handle_create_ignores_empty_text_after_stripping_mention(translator):
     note = Note(
         id="https://mastodon.social/statuses/3",
         attributed_to="https://mastodon.social/users/fulano",
@@ -288,73 +261,41 @@ async def test_handle_create_ignores_empty_text_after_stripping_mention():
     )
     activity = _build_activity(note)
 
-    import workers.inbox_worker as worker_module
-
-    with patch.object(worker_module, "translate_text") as mock_translate:
-        await worker_module.handle_create(activity)
-
-    mock_translate.assert_not_called()
+    await handle_create(activity, translator=translator)
 
+    translator.assert_not_called()
 
-@pytest.mark.asyncio
-async def test_handle_create_ignores_non_note_object():
-    non_note = MagicMock()
-    non_note.__class__ = object
 
-    activity = MagicMock(spec=Create)
-    activity.actor = "https://mastodon.social/users/fulano"
-    activity.object = non_note
+async def test_handle_create_ignores_non_note_object(translator):
+    activity = _FakeActivity(actor="https://mastodon.social/users/fulano", object=object())
 
-    import workers.inbox_worker as worker_module
+    await handle_create(activity, translator=translator)
 
-    with patch.object(worker_module, "translate_text") as mock_translate:
-        await worker_module.handle_create(activity)
+    translator.assert_not_called()
 
-    mock_translate.assert_not_called()
 
-
-@pytest.mark.asyncio
-async def test_handle_create_logs_error_on_send_failure():
+@pytest.mark.slow
+@pytest.mark.parametrize("ap_client", ["post_fails"], indirect=True)
+async def test_handle_create_logs_error_on_send_failure(
+    mention_activity, ap_client, translator, bot_keys
+):
     """Erros no envio são logados mas não propagados."""
-    activity = _build_activity(_note_with_mention("Bonjour"))
-    remote_actor = _make_remote_actor()
-    mock_fetch_client, mock_post_client = _mock_ap_client(remote_actor)
-
-    # simula falha no post
-    mock_post_client.__aenter__.return_value.post.side_effect = Exception("connection refused")
-
-    import workers.inbox_worker as worker_module
-
-    with (
-        patch.object(
-            worker_module,
-            "translate_text",
-            AsyncMock(return_value={"translated": "Olá", "detected_source": "fr"}),
-        ),
-        patch.object(
-            worker_module, "ActivityPubClient", side_effect=[mock_fetch_client, mock_post_client]
-        ),
-        patch.object(worker_module, "get_bot_keys", AsyncMock(return_value=[_make_actor_key()])),
-        patch.object(worker_module, "log") as mock_log,
-    ):
-        await worker_module.handle_create(activity)
+    with patch.object(worker_module, "log") as mock_log:
+        await handle_create(mention_activity, translator=translator, key_source=bot_keys)
 
     mock_log.error.assert_called_once()
     assert "connection refused" in str(mock_log.error.call_args)
 
 
-@pytest.mark.asyncio
-async def test_run_worker_processes_activity_from_queue():
+async def test_run_worker_processes_activity_from_queue(monkeypatch):
     """run_worker consome activity da fila (não ctx)."""
     activity = _build_activity(_note_without_mention())
     test_queue: asyncio.Queue = asyncio.Queue()
     await test_queue.put(activity)
 
-    import workers.inbox_worker as worker_module
-
     with patch.object(worker_module, "handle_create", AsyncMock()) as mock_handle:
-        worker_module.activity_queue = test_queue
-        task = asyncio.create_task(worker_module.run_worker())
+        monkeypatch.setattr(worker_module, "activity_queue", test_queue)
+        task = asyncio.create_task(run_worker())
         await test_queue.join()
         task.cancel()
         try:
@@ -362,11 +303,10 @@ async def test_run_worker_processes_activity_from_queue():
         except asyncio.CancelledError:
             pass
 
-    mock_handle.assert_called_once_with(activity)
+    mock_handle.assert_called_once_with(activity, translator=ANY)
 
 
-@pytest.mark.asyncio
-async def test_handle_create_truncates_long_text():
+async def test_handle_create_truncates_long_text(ap_client, translator, bot_keys):
     """Texto acima de 500 caracteres deve ser truncado antes de ser traduzido."""
     long_text = "A" * 600
     note = Note(
@@ -380,108 +320,69 @@ async def test_handle_create_truncates_long_text():
         to=["https://www.w3.org/ns/activitystreams#Public"],
     )
     activity = _build_activity(note)
-    remote_actor = _make_remote_actor()
-    mock_fetch_client, mock_post_client = _mock_ap_client(remote_actor)
-
-    import workers.inbox_worker as worker_module
-
-    with (
-        patch.object(
-            worker_module,
-            "translate_text",
-            AsyncMock(return_value={"translated": "Texto traduzido", "detected_source": "en"}),
-        ) as mock_translate,
-        patch.object(
-            worker_module, "ActivityPubClient", side_effect=[mock_fetch_client, mock_post_client]
-        ),
-        patch.object(worker_module, "get_bot_keys", AsyncMock(return_value=[_make_actor_key()])),
-    ):
-        await worker_module.handle_create(activity)
 
-    translated_text = mock_translate.call_args[0][0]
+    await handle_create(activity, translator=translator, key_source=bot_keys)
+
+    translated_text = translator.call_args[0][0]
     assert len(translated_text) == 500
 
 
-@pytest.mark.asyncio
-async def test_handle_create_ignores_invalid_actor_url():
+async def test_handle_create_ignores_invalid_actor_url(translator):
     """Actor com URL inválida (sem scheme/netloc) → não tenta buscar actor remoto."""
     activity = _build_activity(_note_with_mention("Hello"), actor_url="not-a-valid-url")
 
-    import workers.inbox_worker as worker_module
+    with patch.object(worker_module, "fetch_actor") as mock_fetch_actor:
+        await handle_create(activity, translator=translator)
 
-    with (
-        patch.object(
-            worker_module,
-            "translate_text",
-            AsyncMock(return_value={"translated": "Olá", "detected_source": "en"}),
-        ),
-        patch.object(worker_module, "ActivityPubClient") as mock_ap_client,
-    ):
-        await worker_module.handle_create(activity)
+    mock_fetch_actor.assert_not_called()
+    translator.assert_not_called()
 
-    mock_ap_client.assert_not_called()
 
+async def test_handle_create_reply_username_ignores_trailing_slash_and_query(
+    ap_client, translator, bot_keys
+):
+    """O @usuário da resposta vem do último segmento do path, sem barra final nem query."""
+    activity = _build_activity(
+        _note_with_mention("Hello"),
+        actor_url="https://mastodon.social/users/fulano/?ref=feed",
+    )
 
-@pytest.mark.asyncio
-async def test_handle_create_logs_error_when_actor_fetch_fails():
-    """Falha ao buscar actor remoto → erro logado, sem propagar exceção."""
-    activity = _build_activity(_note_with_mention("Hello"))
+    await handle_create(activity, translator=translator, key_source=bot_keys)
 
-    mock_fetch_instance = MagicMock()
-    mock_fetch_instance.actor.fetch = AsyncMock(side_effect=Exception("connection refused"))
-    mock_fetch_client = AsyncMock()
-    mock_fetch_client.__aenter__ = AsyncMock(return_value=mock_fetch_instance)
-    mock_fetch_client.__aexit__ = AsyncMock(return_value=False)
+    sent_note = ap_client.post.call_args.kwargs["json"].object
+    assert ">@fulano</a>" in sent_note.content
 
-    import workers.inbox_worker as worker_module
 
-    with (
-        patch.object(
-            worker_module,
-            "translate_text",
-            AsyncMock(return_value={"translated": "Olá", "detected_source": "en"}),
-        ),
-        patch.object(worker_module, "ActivityPubClient", return_value=mock_fetch_client),
-        patch.object(worker_module, "log") as mock_log,
-    ):
-        await worker_module.handle_create(activity)
+async def test_handle_create_logs_error_when_actor_fetch_fails(
+    mention_activity, ap_client, translator
+):
+    """Falha ao buscar actor remoto → erro logado, sem propagar exceção."""
+    ap_client.actor.fetch.side_effect = Exception("connection refused")
+
+    with patch.object(worker_module, "log") as mock_log:
+        await handle_create(mention_activity, translator=translator)
 
     mock_log.error.assert_called_once()
     assert "connection refused" in str(mock_log.error.call_args)
 
 
-@pytest.mark.asyncio
-async def test_handle_create_logs_error_when_no_rsa_key():
+async def test_handle_create_logs_error_when_no_rsa_key(mention_activity, ap_client, translator):
     """Quando nenhuma chave RSA está disponível, loga erro e não envia resposta."""
     non_rsa_key = MagicMock(spec=ActorKey)
     non_rsa_key.private_key = MagicMock()  # não é rsa_module.RSAPrivateKey
 
-    activity = _build_activity(_note_with_mention("Hello"))
-    remote_actor = _make_remote_actor()
-    mock_fetch_client, mock_post_client = _mock_ap_client(remote_actor)
-
-    import workers.inbox_worker as worker_module
-
-    with (
-        patch.object(
-            worker_module,
-            "translate_text",
-            AsyncMock(return_value={"translated": "Olá", "detected_source": "en"}),
-        ),
-        patch.object(
-            worker_module, "ActivityPubClient", side_effect=[mock_fetch_client, mock_post_client]
-        ),
-        patch.object(worker_module, "get_bot_keys", AsyncMock(return_value=[non_rsa_key])),
-        patch.object(worker_module, "log") as mock_log,
-    ):
-        await worker_module.handle_create(activity)
+    with patch.object(worker_module, "log") as mock_log:
+        await handle_create(
+            mention_activity,
+            translator=translator,
+            key_source=AsyncMock(return_value=[non_rsa_key]),
+        )
 
     mock_log.error.assert_called_once()
-    mock_post_client.__aenter__.return_value.post.assert_not_called()
+    ap_client.post.assert_not_called()
 
 
-@pytest.mark.asyncio
-async def test_run_worker_continues_after_error():
+async def test_run_worker_continues_after_error(monkeypatch):
     """run_worker processa o segundo item mesmo que o primeiro falhe."""
     activity1 = _build_activity(_note_without_mention())
     activity2 = _build_activity(_note_without_mention())
@@ -492,18 +393,16 @@ async def test_run_worker_continues_after_error():
 
     call_count = 0
 
-    async def handle_side_effect(activity):
+    async def handle_side_effect(activity, **kwargs):
         nonlocal call_count
         call_count += 1
         if call_count == 1:
             raise RuntimeError("Erro simulado no primeiro item")
 
-    import workers.inbox_worker as worker_module
-
     with patch.object(worker_module, "handle_create", side_effect=handle_side_effect):
-        worker_module.activity_queue = test_queue
-        task = asyncio.create_task(worker_module.run_worker())
-        await asyncio.sleep(0.2)
+        monkeypatch.setattr(worker_module, "activity_queue", test_queue)
+        task = asyncio.create_task(run_worker())
+        await test_queue.join()  # run_worker chama task_done() mesmo quando o item falha
         task.cancel()
         try:
             await task
@@ -511,3 +410,259 @@ async def test_run_worker_continues_after_error():
             pass
 
     assert call_count == 2
+
+
+async def test_run_worker_logs_underlying_translation_error(
+    mention_activity, ap_client, monkeypatch
+):
+    """Falha na tradução é logada com o erro original, não como ExceptionGroup."""
+    test_queue: asyncio.Queue = asyncio.Queue()
+    test_queue.put_nowait(mention_activity)
+    monkeypatch.setattr(worker_module, "activity_queue", test_queue)
+    monkeypatch.setattr(
+        worker_module,
+        "translate_text",
+        AsyncMock(side_effect=RuntimeError("LibreTranslate fora do ar")),
+    )
+
+    with patch.object(worker_module, "log") as mock_log:
+        task = asyncio.create_task(run_worker())
+        await test_queue.join()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    message = mock_log.error.call_args.args[0]
+    assert message == "Erro no worker: LibreTranslate fora do ar"
+    ap_client.post.assert_not_called()
+
+
+async def test_run_worker_waits_idle_until_cancelled(monkeypatch):
+    """Fila vazia: run_worker fica suspenso em get() e termina ao ser cancelado."""
+    test_queue: asyncio.Queue = asyncio.Queue()
+    monkeypatch.setattr(worker_module, "activity_queue", test_queue)
+
+    task = asyncio.create_task(run_worker())
+    await asyncio.sleep(0)
+    assert not task.done()
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+async def test_run_worker_drains_queued_activities_in_one_batch():
+    """Atividades já enfileiradas são retiradas juntas e todas processadas."""
+    activities = [_build_activity(_note_without_mention()) for _ in range(3)]
+    test_queue: asyncio.Queue = asyncio.Queue()
+    for activity in activities:
+        test_queue.put_nowait(activity)
+
+    with patch.object(worker_module, "activity_queue", test_queue):
+        batch = await worker_module._next_batch()
+
+    assert batch == activities
+    assert test_queue.empty()
+
+
+async def test_batch_translator_sends_concurrent_texts_in_one_request(monkeypatch):
+    """Chamadas na mesma volta do loop viram uma única chamada a translate_texts."""
+    batch_translate = AsyncMock(
+        return_value=[
+            {"translated": "Olá", "detected_source": "en"},
+            {"translated": "Bom dia", "detected_source": "fr"},
+        ]
+    )
+    monkeypatch.setattr(worker_module, "translate_texts", batch_translate)
+    translator = worker_module._BatchTranslator()
+
+    results = await asyncio.gather(translator("Hello"), translator("Bonjour"))
+
+    batch_translate.assert_awaited_once_with(["Hello", "Bonjour"])
+    assert [r["translated"] for r in results] == ["Olá", "Bom dia"]
+
+
+async def test_batch_translator_falls_back_to_single_requests(monkeypatch):
+    """Falha no lote → cada texto é traduzido individualmente; erros ficam por item."""
+
+    async def single_translate(text):
+        if text == "quebrado":
+            raise RuntimeError("falhou")
+        return {"translated": text.upper(), "detected_source": "en"}
+
+    monkeypatch.setattr(
+        worker_module, "translate_texts", AsyncMock(side_effect=RuntimeError("lote"))
+    )
+    monkeypatch.setattr(worker_module, "translate_text", single_translate)
+    translator = worker_module._BatchTranslator()
+
+    ok, failed = await asyncio.gather(
+        translator("hello"), translator("quebrado"), return_exceptions=True
+    )
+
+    assert ok["translated"] == "HELLO"
+    assert isinstance(failed, RuntimeError)
+
+
+async def test_handle_create_holds_delivery_slot_during_remote_calls(
+    mention_activity, ap_client, remote_actor, translator, bot_keys
+):
+    """
+    Fetch do actor e entrega ocupam uma vaga do semáforo de entregas; um actor
+    já em cache é resolvido sem tocar no semáforo.
+    """
+    slots = asyncio.Semaphore(1)
+    observed = []
+
+    async def fetch(url):
+        observed.append(slots.locked())
+        return remote_actor
+
+    ap_client.actor.fetch = fetch
+
+    with patch.object(worker_module, "_delivery_slots", slots):
+        await handle_create(mention_activity, translator=translator, key_source=bot_keys)
+
+        assert observed == [True]
+        assert not slots.locked()
+
+        # Com a única vaga ocupada, o acerto no cache não espera por ela
+        async with slots:
+            cached = await asyncio.wait_for(
+                worker_module._resolve_author("https://mastodon.social/users/fulano"), timeout=1
+            )
+
+    assert cached is remote_actor
+    assert observed == [True]
+
+
+async def test_handle_create_reuses_cached_remote_actor(
+    mention_activity, ap_client, translator, bot_keys
+):
+    """Menções seguidas do mesmo autor resolvem o actor remoto uma única vez."""
+    await handle_create(mention_activity, translator=translator, key_source=bot_keys)
+    await handle_create(mention_activity, translator=translator, key_source=bot_keys)
+
+    ap_client.actor.fetch.assert_awaited_once()
+    assert ap_client.post.call_count == 2
+
+
+async def test_handle_create_translates_while_fetching_actor(
+    mention_activity, ap_client, remote_actor, bot_keys
+):
+    """A tradução não espera a busca do actor terminar (e vice-versa)."""
+    fetch_started = asyncio.Event()
+
+    async def fetch(url):
+        fetch_started.set()
+        return remote_actor
+
+    async def translator(text):
+        await asyncio.wait_for(fetch_started.wait(), timeout=1)
+        return {"translated": "Olá", "detected_source": "en"}
+
+    ap_client.actor.fetch = fetch
+
+    await handle_create(mention_activity, translator=translator, key_source=bot_keys)
+
+    ap_client.post.assert_called_once()
+
+
+async def test_handle_create_translation_failure_cancels_actor_fetch(
+    mention_activity, ap_client, bot_keys
+):
+    """Falha na tradução cancela a busca do actor em andamento e libera a vaga."""
+    slots = asyncio.Semaphore(1)
+    fetch_started = asyncio.Event()
+    fetch_cancelled = False
+
+    async def fetch(url):
+        nonlocal fetch_cancelled
+        fetch_started.set()
+        try:
+            await asyncio.Event().wait()  # nunca responde
+        except asyncio.CancelledError:
+            fetch_cancelled = True
+            raise
+
+    async def failing_translator(text):
+        await asyncio.wait_for(fetch_started.wait(), timeout=1)
+        raise RuntimeError("LibreTranslate fora do ar")
+
+    ap_client.actor.fetch = fetch
+
+    with patch.object(worker_module, "_delivery_slots", slots):
+        with pytest.raises(RuntimeError, match="fora do ar"):
+            await handle_create(
+                mention_activity, translator=failing_translator, key_source=bot_keys
+            )
+
+    assert fetch_cancelled
+    assert not slots.locked()
+    ap_client.post.assert_not_called()
+
+
+async def test_handle_create_unresolved_author_cancels_translation(mention_activity, ap_client):
+    """Actor não resolvido cancela a tradução em andamento; nada é enviado."""
+    translation_cancelled = False
+
+    async def slow_translator(text):
+        nonlocal translation_cancelled
+        try:
+            await asyncio.Event().wait()  # nunca responde
+        except asyncio.CancelledError:
+            translation_cancelled = True
+            raise
+
+    ap_client.actor.fetch.return_value = None
+
+    await asyncio.wait_for(handle_create(mention_activity, translator=slow_translator), timeout=1)
+
+    assert translation_cancelled
+    ap_client.post.assert_not_called()
+
+
+async def test_handle_create_logs_error_when_actor_not_found(
+    mention_activity, ap_client, translator
+):
+    """Actor remoto não resolvido (None) → erro logado e nada é enviado."""
+    ap_client.actor.fetch.return_value = None
+
+    with patch.object(worker_module, "log") as mock_log:
+        await handle_create(mention_activity, translator=translator)
+
+    mock_log.error.assert_called_once()
+    ap_client.post.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# extract_plain_text
+# ---------------------------------------------------------------------------
+
+
+def test_extract_plain_text_strips_mention_and_tags():
+    content = _note_with_mention("Bonjour tout le monde").content
+    assert extract_plain_text(content) == "Bonjour tout le monde"
+
+
+def test_extract_plain_text_handles_mention_among_other_classes_and_entities():
+    content = (
+        '<p><span class="h-card mention"><a href="https://bot.test/users/testbot">'
+        "@<span>testbot</span></a></span> Tom &amp; Jerry</p>"
+    )
+    assert extract_plain_text(content) == "Tom & Jerry"
+
+
+def test_extract_plain_text_keeps_spans_after_nested_mention():
+    content = (
+        '<p><span class="mention">@<span>testbot</span></span> '
+        "<span>Guten</span> <span>Morgen</span></p>"
+    )
+    assert extract_plain_text(content) == "Guten Morgen"
+
+
+def test_extract_plain_text_collapses_whitespace_between_blocks():
+    content = '<p><span class="mention">@testbot</span> Hola</p>\n<p>  mundo\n</p>'
+    assert extract_plain_text(content) == "Hola mundo"
@@ -7,6 +7,7 @@ que é a forma recomendada para testar apps FastAPI/Starlette assíncronos.
 Cobre:
 - GET /users/{username}               → 200 com Actor JSON-LD do bot
 - GET /users/{username}               → 404 para username desconhecido
+- GET /users/{username}               → publica a chave nova após rotação + reload_keys()
 - GET /users/{username}/followers     → 200 com OrderedCollection vazia
 - GET /users/{username}/followers     → 404 para username desconhecido
 - GET /users/{username}/outbox        → 200 com OrderedCollection vazia
@@ -14,6 +15,7 @@ Cobre:
 - GET /.well-known/webfinger          → 200 com JRD correto para o bot
 - GET /.well-known/webfinger          → 404 para conta desconhecida
 - GET /.well-known/webfinger          → 404 para domínio errado
+- GET /users/{username}/notes/{id}    → 404 para nota inexistente ou username desconhecido
 - GET /nodeinfo/2.1                   → 200 com NodeInfo válido
 - GET /health                         → 200 com {"status": "ok"}
 - Lifespan: init_db é chamado no startup
@@ -33,19 +35,26 @@ from httpx import ASGITransport, AsyncClient
 # ---------------------------------------------------------------------------
 
 
-@pytest_asyncio.fixture
-async def client(in_memory_db):
-    with (
-        patch("app.database.init_db", AsyncMock()),
-        patch("workers.inbox_worker.run_worker", AsyncMock()),
-    ):
-        from app.main import api
+@pytest_asyncio.fixture(scope="session")
+async def client(test_settings):
+    """
+    Um único AsyncClient + ASGITransport para a sessão inteira.
+    ASGITransport não dispara o lifespan, então init_db e run_worker nunca
+    rodam aqui — os testes de lifespan abaixo os exercitam com LifespanManager.
+    Depende de test_settings para que app.main seja importado já com as settings de teste.
+    """
+    from app.main import api
+
+    async with AsyncClient(
+        transport=ASGITransport(app=api),
+        base_url="https://bot.test",
+    ) as ac:
+        yield ac
 
-        async with AsyncClient(
-            transport=ASGITransport(app=api),
-            base_url="https://bot.test",
-        ) as ac:
-            yield ac
+
+@pytest.fixture(autouse=True)
+def use_in_memory_db(in_memory_db):
+    """Endpoints que consultam o banco (followers) leem o banco em memória de cada teste."""
 
 
 # ---------------------------------------------------------------------------
@@ -53,61 +62,77 @@ async def client(in_memory_db):
 # ---------------------------------------------------------------------------
 
 
-@pytest.mark.asyncio
-async def test_get_actor_returns_200_for_bot(client):
-    response = await client.get("/users/testbot")
-    assert response.status_code == 200
+@pytest_asyncio.fixture(scope="module")
+async def actor_response(client):
+    """GET /users/testbot feito uma única vez; os testes abaixo só inspecionam a resposta."""
+    return await client.get("/users/testbot")
 
 
-@pytest.mark.asyncio
-async def test_get_actor_content_type(client):
-    response = await client.get("/users/testbot")
-    assert "application/activity+json" in response.headers["content-type"]
+@pytest.fixture(scope="module")
+def actor_body(actor_response):
+    """Corpo JSON do actor, decodificado uma única vez."""
+    return actor_response.json()
 
 
-@pytest.mark.asyncio
-async def test_get_actor_body_has_correct_id(client):
-    response = await client.get("/users/testbot")
-    data = response.json()
-    assert data["id"] == "https://bot.test/users/testbot"
+async def test_get_actor_returns_200_for_bot(actor_response):
+    assert actor_response.status_code == 200
 
 
-@pytest.mark.asyncio
-async def test_get_actor_body_has_inbox(client):
-    response = await client.get("/users/testbot")
-    data = response.json()
-    assert data["inbox"] == "https://bot.test/users/testbot/inbox"
+async def test_get_actor_content_type(actor_response):
+    assert "application/activity+json" in actor_response.headers["content-type"]
 
 
-@pytest.mark.asyncio
-async def test_get_actor_body_has_followers_url(client):
-    """Actor deve declarar o endpoint de followers."""
-    response = await client.get("/users/testbot")
-    data = response.json()
-    assert data["followers"] == "https://bot.test/users/testbot/followers"
+@pytest.mark.parametrize(
+    ("field", "expected"),
+    [
+        ("id", "https://bot.test/users/testbot"),
+        ("inbox", "https://bot.test/users/testbot/inbox"),
+        # Actor deve declarar os endpoints de followers e outbox
+        ("followers", "https://bot.test/users/testbot/followers"),
+        ("outbox", "https://bot.test/users/testbot/outbox"),
+    ],
+)
+async def test_get_actor_body_urls(actor_body, field, expected):
+    assert actor_body[field] == expected
 
 
-@pytest.mark.asyncio
-async def test_get_actor_body_has_outbox_url(client):
-    """Actor deve declarar o endpoint de outbox."""
-    response = await client.get("/users/testbot")
-    data = response.json()
-    assert data["outbox"] == "https://bot.test/users/testbot/outbox"
+async def test_get_actor_body_has_public_key(actor_body):
+    assert "publicKey" in actor_body
+    assert "publicKeyPem" in actor_body["publicKey"]
+    assert "BEGIN PUBLIC KEY" in actor_body["publicKey"]["publicKeyPem"]
 
 
-@pytest.mark.asyncio
-async def test_get_actor_body_has_public_key(client):
-    response = await client.get("/users/testbot")
-    data = response.json()
-    assert "publicKey" in data
-    assert "publicKeyPem" in data["publicKey"]
-    assert "BEGIN PUBLIC KEY" in data["publicKey"]["publicKeyPem"]
+async def test_get_actor_publishes_rotated_key(client, monkeypatch, tmp_path):
+    """Após rotação + reload_keys(), o documento do actor publica a nova chave pública."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
 
+    from app.activitypub.keys import reload_keys
+    from app.config import settings
 
-@pytest.mark.asyncio
-async def test_get_actor_returns_404_for_unknown_user(client):
-    response = await client.get("/users/outrobot")
-    assert response.status_code == 404
+    rotated_pem = (
+        rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        .public_key()
+        .public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        .decode()
+    )
+    rotated_path = tmp_path / "rotated.pem"
+    rotated_path.write_text(rotated_pem)
+
+    await client.get("/users/testbot")  # documento com a chave antiga já em cache
+    monkeypatch.setattr(settings, "public_key_path", str(rotated_path))
+    try:
+        reload_keys()
+        response = await client.get("/users/testbot")
+    finally:
+        # Os demais testes do módulo voltam a ver a chave de teste original
+        monkeypatch.undo()
+        reload_keys()
+
+    assert response.json()["publicKey"]["publicKeyPem"] == rotated_pem
 
 
 # ---------------------------------------------------------------------------
@@ -115,54 +140,23 @@ async def test_get_actor_returns_404_for_unknown_user(client):
 # ---------------------------------------------------------------------------
 
 
-@pytest.mark.asyncio
-async def test_get_followers_returns_200_for_bot(client):
+async def test_get_followers_returns_empty_ordered_collection(client):
+    """
+    Uma única requisição para todas as asserções da coleção vazia — o banco é
+    por teste, então a resposta não pode ser compartilhada entre testes.
+    """
     response = await client.get("/users/testbot/followers")
     assert response.status_code == 200
-
-
-@pytest.mark.asyncio
-async def test_get_followers_content_type(client):
-    response = await client.get("/users/testbot/followers")
     assert "application/activity+json" in response.headers["content-type"]
 
-
-@pytest.mark.asyncio
-async def test_get_followers_body_is_ordered_collection(client):
-    response = await client.get("/users/testbot/followers")
     data = response.json()
+    assert data["@context"] == "https://www.w3.org/ns/activitystreams"
     assert data["type"] == "OrderedCollection"
-
-
-@pytest.mark.asyncio
-async def test_get_followers_body_has_correct_id(client):
-    response = await client.get("/users/testbot/followers")
-    data = response.json()
     assert data["id"] == "https://bot.test/users/testbot/followers"
-
-
-@pytest.mark.asyncio
-async def test_get_followers_body_has_context(client):
-    response = await client.get("/users/testbot/followers")
-    data = response.json()
-    assert data["@context"] == "https://www.w3.org/ns/activitystreams"
-
-
-@pytest.mark.asyncio
-async def test_get_followers_returns_404_for_unknown_user(client):
-    response = await client.get("/users/outrobot/followers")
-    assert response.status_code == 404
-
-
-@pytest.mark.asyncio
-async def test_get_followers_returns_empty_when_no_followers(client):
-    response = await client.get("/users/testbot/followers")
-    data = response.json()
     assert data["totalItems"] == 0
     assert data["orderedItems"] == []
 
 
-@pytest.mark.asyncio
 async def test_get_followers_returns_real_count(client, in_memory_db):
     from app.models.follower import Follower
 
@@ -186,7 +180,6 @@ async def test_get_followers_returns_real_count(client, in_memory_db):
     assert data["totalItems"] == 2
 
 
-@pytest.mark.asyncio
 async def test_get_followers_returns_actor_urls(client, in_memory_db):
     from app.models.follower import Follower
 
@@ -209,43 +202,34 @@ async def test_get_followers_returns_actor_urls(client, in_memory_db):
 # ---------------------------------------------------------------------------
 
 
-@pytest.mark.asyncio
-async def test_get_outbox_returns_200_for_bot(client):
-    response = await client.get("/users/testbot/outbox")
-    assert response.status_code == 200
+@pytest_asyncio.fixture(scope="module")
+async def outbox_response(client):
+    return await client.get("/users/testbot/outbox")
 
 
-@pytest.mark.asyncio
-async def test_get_outbox_content_type(client):
-    response = await client.get("/users/testbot/outbox")
-    assert "application/activity+json" in response.headers["content-type"]
+@pytest.fixture(scope="module")
+def outbox_body(outbox_response):
+    return outbox_response.json()
 
 
-@pytest.mark.asyncio
-async def test_get_outbox_body_is_ordered_collection(client):
-    response = await client.get("/users/testbot/outbox")
-    data = response.json()
-    assert data["type"] == "OrderedCollection"
+async def test_get_outbox_returns_200_for_bot(outbox_response):
+    assert outbox_response.status_code == 200
 
 
-@pytest.mark.asyncio
-async def test_get_outbox_body_has_correct_id(client):
-    response = await client.get("/users/testbot/outbox")
-    data = response.json()
-    assert data["id"] == "https://bot.test/users/testbot/outbox"
+async def test_get_outbox_content_type(outbox_response):
+    assert "application/activity+json" in outbox_response.headers["content-type"]
 
 
-@pytest.mark.asyncio
-async def test_get_outbox_body_has_context(client):
-    response = await client.get("/users/testbot/outbox")
-    data = response.json()
-    assert data["@context"] == "https://www.w3.org/ns/activitystreams"
-
-
-@pytest.mark.asyncio
-async def test_get_outbox_returns_404_for_unknown_user(client):
-    response = await client.get("/users/outrobot/outbox")
-    assert response.status_code == 404
+@pytest.mark.parametrize(
+    ("field", "expected"),
+    [
+        ("type", "OrderedCollection"),
+        ("id", "https://bot.test/users/testbot/outbox"),
+        ("@context", "https://www.w3.org/ns/activitystreams"),
+    ],
+)
+async def test_get_outbox_body(outbox_body, field, expected):
+    assert outbox_body[field] == expected
 
 
 # ---------------------------------------------------------------------------
@@ -253,103 +237,63 @@ async def test_get_outbox_returns_404_for_unknown_user(client):
 # ---------------------------------------------------------------------------
 
 
-@pytest.mark.asyncio
-async def test_webfinger_returns_200_for_bot(client):
-    response = await client.get(
+@pytest_asyncio.fixture(scope="module")
+async def webfinger_response(client):
+    return await client.get(
         "/.well-known/webfinger",
         params={"resource": "acct:testbot@bot.test"},
     )
-    assert response.status_code == 200
 
 
-@pytest.mark.asyncio
-async def test_webfinger_content_type(client):
-    response = await client.get(
+@pytest_asyncio.fixture(scope="module")
+async def webfinger_url_response(client):
+    return await client.get(
         "/.well-known/webfinger",
-        params={"resource": "acct:testbot@bot.test"},
-    )
-    assert "application/jrd+json" in response.headers["content-type"]
-
-
-@pytest.mark.asyncio
-async def test_webfinger_body_has_subject(client):
-    response = await client.get(
-        "/.well-known/webfinger",
-        params={"resource": "acct:testbot@bot.test"},
+        params={"resource": "https://bot.test/users/testbot"},
     )
-    data = response.json()
-    assert data["subject"] == "acct:testbot@bot.test"
 
 
-@pytest.mark.asyncio
-async def test_webfinger_body_has_self_link(client):
-    response = await client.get(
-        "/.well-known/webfinger",
-        params={"resource": "acct:testbot@bot.test"},
-    )
-    data = response.json()
-    self_links = [link for link in data["links"] if link["rel"] == "self"]
-    assert len(self_links) == 1
-    assert self_links[0]["href"] == "https://bot.test/users/testbot"
-    assert self_links[0]["type"] == "application/activity+json"
+@pytest.fixture(scope="module")
+def webfinger_body(webfinger_response):
+    return webfinger_response.json()
 
 
-@pytest.mark.asyncio
-async def test_webfinger_returns_404_for_unknown_user(client):
-    response = await client.get(
-        "/.well-known/webfinger",
-        params={"resource": "acct:fantasma@bot.test"},
-    )
-    assert response.status_code == 404
+@pytest.fixture(scope="module")
+def webfinger_url_body(webfinger_url_response):
+    return webfinger_url_response.json()
 
 
-@pytest.mark.asyncio
-async def test_webfinger_returns_404_for_wrong_domain(client):
-    response = await client.get(
-        "/.well-known/webfinger",
-        params={"resource": "acct:testbot@outro.dominio.com"},
-    )
-    assert response.status_code == 404
+async def test_webfinger_returns_200_for_bot(webfinger_response):
+    assert webfinger_response.status_code == 200
 
 
-@pytest.mark.asyncio
-async def test_webfinger_returns_200_for_https_url(client):
-    response = await client.get(
-        "/.well-known/webfinger",
-        params={"resource": "https://bot.test/users/testbot"},
-    )
-    assert response.status_code == 200
+async def test_webfinger_content_type(webfinger_response):
+    assert "application/jrd+json" in webfinger_response.headers["content-type"]
 
 
-@pytest.mark.asyncio
-async def test_webfinger_https_url_body_has_subject(client):
-    response = await client.get(
-        "/.well-known/webfinger",
-        params={"resource": "https://bot.test/users/testbot"},
-    )
-    data = response.json()
-    assert data["subject"] == "acct:testbot@bot.test"
+async def test_webfinger_body_has_subject(webfinger_body):
+    assert webfinger_body["subject"] == "acct:testbot@bot.test"
 
 
-@pytest.mark.asyncio
-async def test_webfinger_https_url_body_has_self_link(client):
-    response = await client.get(
-        "/.well-known/webfinger",
-        params={"resource": "https://bot.test/users/testbot"},
-    )
-    data = response.json()
-    self_links = [link for link in data["links"] if link["rel"] == "self"]
+async def test_webfinger_body_has_self_link(webfinger_body):
+    self_links = [link for link in webfinger_body["links"] if link["rel"] == "self"]
     assert len(self_links) == 1
     assert self_links[0]["href"] == "https://bot.test/users/testbot"
+    assert self_links[0]["type"] == "application/activity+json"
 
 
-@pytest.mark.asyncio
-async def test_webfinger_returns_404_for_unknown_https_url(client):
-    response = await client.get(
-        "/.well-known/webfinger",
-        params={"resource": "https://bot.test/users/outro"},
-    )
-    assert response.status_code == 404
+async def test_webfinger_returns_200_for_https_url(webfinger_url_response):
+    assert webfinger_url_response.status_code == 200
+
+
+async def test_webfinger_https_url_body_has_subject(webfinger_url_body):
+    assert webfinger_url_body["subject"] == "acct:testbot@bot.test"
+
+
+async def test_webfinger_https_url_body_has_self_link(webfinger_url_body):
+    self_links = [link for link in webfinger_url_body["links"] if link["rel"] == "self"]
+    assert len(self_links) == 1
+    assert self_links[0]["href"] == "https://bot.test/users/testbot"
 
 
 # ---------------------------------------------------------------------------
@@ -357,7 +301,6 @@ async def test_webfinger_returns_404_for_unknown_https_url(client):
 # ---------------------------------------------------------------------------
 
 
-@pytest.mark.asyncio
 async def test_get_note_returns_200_for_stored_note(client):
     from apkit.models import Note
 
@@ -376,55 +319,55 @@ async def test_get_note_returns_200_for_stored_note(client):
     note_store._notes.pop("abc", None)
 
 
-@pytest.mark.asyncio
-async def test_get_note_returns_404_for_missing_note(client):
-    response = await client.get("/users/testbot/notes/nao-existe")
-    assert response.status_code == 404
-
-
-@pytest.mark.asyncio
-async def test_get_note_returns_404_for_unknown_user(client):
-    response = await client.get("/users/outrobot/notes/qualquer")
-    assert response.status_code == 404
-
-
 # ---------------------------------------------------------------------------
 # GET /nodeinfo/2.1
 # ---------------------------------------------------------------------------
 
 
-@pytest.mark.asyncio
-async def test_nodeinfo_returns_200(client):
+async def test_nodeinfo(client):
     response = await client.get("/nodeinfo/2.1")
     assert response.status_code == 200
 
-
-@pytest.mark.asyncio
-async def test_nodeinfo_version(client):
-    response = await client.get("/nodeinfo/2.1")
     data = response.json()
     assert data["version"] == "2.1"
-
-
-@pytest.mark.asyncio
-async def test_nodeinfo_software_name(client):
-    response = await client.get("/nodeinfo/2.1")
-    data = response.json()
     assert data["software"]["name"] == "translate-bot"
+    assert "activitypub" in data["protocols"]
+    assert data["openRegistrations"] is False
 
 
-@pytest.mark.asyncio
-async def test_nodeinfo_protocols(client):
-    response = await client.get("/nodeinfo/2.1")
-    data = response.json()
-    assert "activitypub" in data["protocols"]
+# ---------------------------------------------------------------------------
+# Respostas 404
+# ---------------------------------------------------------------------------
 
 
-@pytest.mark.asyncio
-async def test_nodeinfo_open_registrations(client):
-    response = await client.get("/nodeinfo/2.1")
-    data = response.json()
-    assert data["openRegistrations"] is False
+@pytest.mark.parametrize(
+    ("url", "params"),
+    [
+        pytest.param("/users/outrobot", None, id="actor-unknown-user"),
+        pytest.param("/users/outrobot/followers", None, id="followers-unknown-user"),
+        pytest.param("/users/outrobot/outbox", None, id="outbox-unknown-user"),
+        pytest.param(
+            "/.well-known/webfinger",
+            {"resource": "acct:fantasma@bot.test"},
+            id="webfinger-unknown-user",
+        ),
+        pytest.param(
+            "/.well-known/webfinger",
+            {"resource": "acct:testbot@outro.dominio.com"},
+            id="webfinger-wrong-domain",
+        ),
+        pytest.param(
+            "/.well-known/webfinger",
+            {"resource": "https://bot.test/users/outro"},
+            id="webfinger-unknown-https-url",
+        ),
+        pytest.param("/users/testbot/notes/nao-existe", None, id="note-missing"),
+        pytest.param("/users/outrobot/notes/qualquer", None, id="note-unknown-user"),
+    ],
+)
+async def test_returns_404(client, url, params):
+    response = await client.get(url, params=params)
+    assert response.status_code == 404
 
 
 # ---------------------------------------------------------------------------
@@ -432,31 +375,22 @@ async def test_nodeinfo_open_registrations(client):
 # ---------------------------------------------------------------------------
 
 
-@pytest.mark.asyncio
-async def test_health_returns_200(client):
+async def test_health(client):
     response = await client.get("/health")
     assert response.status_code == 200
-
-
-@pytest.mark.asyncio
-async def test_health_body(client):
-    response = await client.get("/health")
     assert response.json() == {"status": "ok"}
 
 
 # ---------------------------------------------------------------------------
 # Lifespan: inicialização e shutdown
 # ---------------------------------------------------------------------------
+# O lifespan resolve app.database.init_db e workers.inbox_worker.run_worker
+# pelo módulo a cada startup, então basta patchear os atributos — sem reimportar app.main.
 
 
-@pytest.mark.asyncio
 async def test_lifespan_calls_init_db():
     mock_init_db = AsyncMock()
 
-    import sys
-
-    sys.modules.pop("app.main", None)
-
     with (
         patch("app.database.init_db", mock_init_db),
         patch("workers.inbox_worker.run_worker", AsyncMock()),
@@ -469,14 +403,9 @@ async def test_lifespan_calls_init_db():
     mock_init_db.assert_called_once()
 
 
-@pytest.mark.asyncio
 async def test_lifespan_starts_worker():
     mock_run_worker = AsyncMock()
 
-    import sys
-
-    sys.modules.pop("app.main", None)
-
     with (
         patch("app.database.init_db", AsyncMock()),
         patch("workers.inbox_worker.run_worker", mock_run_worker),
@@ -0,0 +1,84 @@
+"""
+Testes para app/services/queue.py
+
+Cobre:
+- InboxChannel: entrega os itens em ordem FIFO
+- InboxChannel: get() aguarda até que um item seja enfileirado
+- InboxChannel: put_nowait levanta QueueFull quando cheio
+- InboxChannel: put() aguarda uma vaga quando cheio
+- InboxChannel: get_nowait levanta QueueEmpty quando vazio
+- InboxChannel: join() retorna após task_done() de todos os itens
+- InboxChannel: task_done() em excesso levanta ValueError
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.queue import InboxChannel
+
+
+async def test_channel_is_fifo():
+    channel = InboxChannel()
+    channel.put_nowait(1)
+    channel.put_nowait(2)
+
+    assert await channel.get() == 1
+    assert channel.get_nowait() == 2
+    assert channel.empty()
+
+
+async def test_channel_get_waits_for_item():
+    channel = InboxChannel()
+    getter = asyncio.create_task(channel.get())
+    await asyncio.sleep(0)
+    assert not getter.done()
+
+    channel.put_nowait("activity")
+
+    assert await asyncio.wait_for(getter, timeout=1) == "activity"
+
+
+def test_channel_put_nowait_raises_when_full():
+    channel = InboxChannel(maxsize=1)
+    channel.put_nowait(1)
+
+    assert channel.full()
+    with pytest.raises(asyncio.QueueFull):
+        channel.put_nowait(2)
+
+
+async def test_channel_put_waits_for_room():
+    channel = InboxChannel(maxsize=1)
+    channel.put_nowait(1)
+    putter = asyncio.create_task(channel.put(2))
+    await asyncio.sleep(0)
+    assert not putter.done()
+
+    assert await channel.get() == 1
+    await asyncio.wait_for(putter, timeout=1)
+
+    assert channel.get_nowait() == 2
+
+
+def test_channel_get_nowait_raises_when_empty():
+    with pytest.raises(asyncio.QueueEmpty):
+        InboxChannel().get_nowait()
+
+
+async def test_channel_join_waits_for_task_done():
+    channel = InboxChannel()
+    channel.put_nowait(1)
+    joiner = asyncio.create_task(channel.join())
+
+    await channel.get()
+    await asyncio.sleep(0)
+    assert not joiner.done()
+
+    channel.task_done()
+    await asyncio.wait_for(joiner, timeout=1)
+
+
+def test_channel_task_done_too_many_times_raises():
+    with pytest.raises(ValueError):
+        InboxChannel().task_done()
@@ -9,193 +9,199 @@ Cobre:
 - Fallback "?" quando detectedLanguage está ausente
 - Erros HTTP da API (4xx, 5xx)
 - Timeout da requisição
+- translate_texts(): vários textos numa única requisição, resultados na ordem
+- Cliente HTTP reutilizado entre chamadas e fechado por close_client()
 """
 
-import pytest
+import json
+
 import httpx
-from unittest.mock import AsyncMock, patch, MagicMock
-
-from app.services.translate import translate_text
-
-
-def _mock_response(translated: str, detected: str, status: int = 200) -> MagicMock:
-    """Monta um httpx.Response fake com a estrutura da LibreTranslate API."""
-    mock = MagicMock(spec=httpx.Response)
-    mock.status_code = status
-    mock.json.return_value = {
-        "translatedText": translated,
-        "detectedLanguage": {"language": detected, "confidence": 0.9},
-    }
-    mock.raise_for_status = MagicMock()
-    return mock
-
-
-def _mock_error_response(status: int) -> MagicMock:
-    mock = MagicMock(spec=httpx.Response)
-    mock.status_code = status
-    mock.raise_for_status.side_effect = httpx.HTTPStatusError(
-        message=f"HTTP {status}",
-        request=MagicMock(),
-        response=mock,
-    )
-    return mock
+import pytest
+import pytest_asyncio
 
+from app.services import translate as translate_module
+from app.services.translate import translate_text, translate_texts
 
-@pytest.mark.asyncio
-async def test_translate_returns_translated_text():
-    """Resultado deve conter o texto traduzido e o idioma detectado."""
-    mock_resp = _mock_response(translated="Olá mundo", detected="en")
 
-    with patch("app.services.translate.httpx.AsyncClient") as mock_client_cls:
-        mock_client = AsyncMock()
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=False)
-        mock_client.post = AsyncMock(return_value=mock_resp)
-        mock_client_cls.return_value = mock_client
+@pytest.fixture(autouse=True)
+def reset_http_client(monkeypatch):
+    """O cliente HTTP é compartilhado por processo — cada teste começa sem ele."""
+    monkeypatch.setattr(translate_module, "_client", None)
+
+
+def _translation_response(translated: str, detected: str | None = None) -> httpx.Response:
+    """Resposta da LibreTranslate API; sem `detected`, omite detectedLanguage."""
+    body = {"translatedText": translated}
+    if detected is not None:
+        body["detectedLanguage"] = {"language": detected, "confidence": 0.9}
+    return httpx.Response(200, json=body)
+
+
+class FakeLibreTranslate:
+    """
+    Handler de httpx.MockTransport: registra as requisições recebidas e
+    devolve `response` — ou a levanta, se for uma exceção.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.requests: list[httpx.Request] = []
+        self.response: httpx.Response | Exception = _translation_response("X", "en")
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+    @property
+    def last_json(self) -> dict:
+        return json.loads(self.requests[-1].content)
 
-        result = await translate_text("Hello world", target="pt")
+
+@pytest_asyncio.fixture(scope="module")
+async def libretranslate_api():
+    """Um único AsyncClient sobre MockTransport para o módulo — httpx real, sem rede."""
+    fake = FakeLibreTranslate()
+    async with httpx.AsyncClient(transport=httpx.MockTransport(fake)) as client:
+        yield fake, client
+
+
+@pytest.fixture
+def libretranslate(libretranslate_api, monkeypatch):
+    """Instala o cliente compartilhado em translate_module e zera o estado do fake."""
+    fake, client = libretranslate_api
+    fake.reset()
+    monkeypatch.setattr(translate_module, "_client", client)
+    return fake
+
+
+async def test_translate_returns_translated_text(libretranslate):
+    """Resultado deve conter o texto traduzido e o idioma detectado."""
+    libretranslate.response = _translation_response("Olá mundo", "en")
+
+    result = await translate_text("Hello world", target="pt")
 
     assert result["translated"] == "Olá mundo"
     assert result["detected_source"] == "en"
 
 
-@pytest.mark.asyncio
-async def test_translate_uses_default_target_language():
+async def test_translate_uses_default_target_language(libretranslate):
     """
     Quando `target` não é passado, deve usar settings.target_language ("pt").
     Verifica que o parâmetro `target` enviado à API é "pt".
     """
-    mock_resp = _mock_response(translated="Bonjour", detected="pt")
+    await translate_text("Bonjour")
 
-    with patch("app.services.translate.httpx.AsyncClient") as mock_client_cls:
-        mock_client = AsyncMock()
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=False)
-        mock_client.post = AsyncMock(return_value=mock_resp)
-        mock_client_cls.return_value = mock_client
+    assert libretranslate.last_json["target"] == "pt"
 
-        await translate_text("Bonjour")
 
-        _, kwargs = mock_client.post.call_args
-        assert kwargs["json"]["target"] == "pt"
+async def test_translate_uses_explicit_target_language(libretranslate):
+    """Quando `target` é passado, ele deve sobrescrever o padrão das settings."""
+    await translate_text("Olá", target="en")
 
+    assert libretranslate.last_json["target"] == "en"
 
-@pytest.mark.asyncio
-async def test_translate_uses_explicit_target_language():
-    """Quando `target` é passado, ele deve sobrescrever o padrão das settings."""
-    mock_resp = _mock_response(translated="Hello", detected="pt")
 
-    with patch("app.services.translate.httpx.AsyncClient") as mock_client_cls:
-        mock_client = AsyncMock()
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=False)
-        mock_client.post = AsyncMock(return_value=mock_resp)
-        mock_client_cls.return_value = mock_client
+async def test_translate_sends_api_key(libretranslate):
+    """A API key das settings deve ser enviada no body da requisição."""
+    await translate_text("test")
 
-        await translate_text("Olá", target="en")
+    assert libretranslate.last_json["api_key"] == "fake-api-key"
 
-        _, kwargs = mock_client.post.call_args
-        assert kwargs["json"]["target"] == "en"
 
+async def test_translate_sends_source_auto(libretranslate):
+    """O campo `source` deve sempre ser enviado como "auto"."""
+    await translate_text("test")
 
-@pytest.mark.asyncio
-async def test_translate_sends_api_key():
-    """A API key das settings deve ser enviada no body da requisição."""
-    mock_resp = _mock_response(translated="X", detected="en")
+    assert libretranslate.last_json["source"] == "auto"
 
-    with patch("app.services.translate.httpx.AsyncClient") as mock_client_cls:
-        mock_client = AsyncMock()
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=False)
-        mock_client.post = AsyncMock(return_value=mock_resp)
-        mock_client_cls.return_value = mock_client
 
-        await translate_text("test")
+async def test_translate_uses_libretranslate_url(libretranslate):
+    """A URL da instância LibreTranslate deve ser usada no endpoint."""
+    await translate_text("test")
 
-        _, kwargs = mock_client.post.call_args
-        assert kwargs["json"]["api_key"] == "fake-api-key"
+    request = libretranslate.requests[-1]
+    assert request.method == "POST"
+    assert str(request.url) == "http://libretranslate.test/translate"
 
 
-@pytest.mark.asyncio
-async def test_translate_sends_source_auto():
-    """O campo `source` deve sempre ser enviado como "auto"."""
-    mock_resp = _mock_response(translated="X", detected="en")
+async def test_translate_detected_source_fallback(libretranslate):
+    """Se a API não retornar `detectedLanguage`, deve usar '?' como fallback."""
+    libretranslate.response = _translation_response("Texto")
 
-    with patch("app.services.translate.httpx.AsyncClient") as mock_client_cls:
-        mock_client = AsyncMock()
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=False)
-        mock_client.post = AsyncMock(return_value=mock_resp)
-        mock_client_cls.return_value = mock_client
+    result = await translate_text("Texto")
 
-        await translate_text("test")
+    assert result["detected_source"] == "?"
 
-        _, kwargs = mock_client.post.call_args
-        assert kwargs["json"]["source"] == "auto"
 
+async def test_translate_raises_on_http_error(libretranslate):
+    """Deve propagar HTTPStatusError em respostas 4xx/5xx."""
+    libretranslate.response = httpx.Response(403, json={"error": "Invalid API key"})
 
-@pytest.mark.asyncio
-async def test_translate_uses_libretranslate_url():
-    """A URL da instância LibreTranslate deve ser usada no endpoint."""
-    mock_resp = _mock_response(translated="X", detected="en")
+    with pytest.raises(httpx.HTTPStatusError):
+        await translate_text("Hello")
 
-    with patch("app.services.translate.httpx.AsyncClient") as mock_client_cls:
-        mock_client = AsyncMock()
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=False)
-        mock_client.post = AsyncMock(return_value=mock_resp)
-        mock_client_cls.return_value = mock_client
 
-        await translate_text("test")
+async def test_translate_raises_on_timeout(libretranslate):
+    """Deve propagar TimeoutException quando a API não responder a tempo."""
+    libretranslate.response = httpx.ReadTimeout("timeout")
+
+    with pytest.raises(httpx.TimeoutException):
+        await translate_text("Hello")
+
+
+async def test_translate_texts_sends_one_request_and_keeps_order(libretranslate):
+    """Os textos vão como lista em `q`; cada resultado corresponde ao texto na mesma posição."""
+    libretranslate.response = httpx.Response(
+        200,
+        json={
+            "translatedText": ["Olá", "Bom dia"],
+            "detectedLanguage": [
+                {"language": "en", "confidence": 0.9},
+                {"language": "fr", "confidence": 0.8},
+            ],
+        },
+    )
 
-        url, _ = mock_client.post.call_args
-        assert url[0] == "http://libretranslate.test/translate"
+    results = await translate_texts(["Hello", "Bonjour"])
 
+    assert len(libretranslate.requests) == 1
+    assert libretranslate.last_json["q"] == ["Hello", "Bonjour"]
+    assert results == [
+        {"translated": "Olá", "detected_source": "en"},
+        {"translated": "Bom dia", "detected_source": "fr"},
+    ]
 
-@pytest.mark.asyncio
-async def test_translate_detected_source_fallback():
-    """Se a API não retornar `detectedLanguage`, deve usar '?' como fallback."""
-    mock = MagicMock(spec=httpx.Response)
-    mock.raise_for_status = MagicMock()
-    mock.json.return_value = {"translatedText": "Texto"}
 
-    with patch("app.services.translate.httpx.AsyncClient") as mock_client_cls:
-        mock_client = AsyncMock()
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=False)
-        mock_client.post = AsyncMock(return_value=mock)
-        mock_client_cls.return_value = mock_client
+async def test_translate_reuses_http_client(monkeypatch):
+    """Chamadas consecutivas devem reaproveitar o mesmo cliente HTTP."""
+    fake = FakeLibreTranslate()
+    created = []
+    real_async_client = httpx.AsyncClient
 
-        result = await translate_text("Texto")
+    def make_client(**kwargs):
+        client = real_async_client(transport=httpx.MockTransport(fake), **kwargs)
+        created.append(client)
+        return client
 
-    assert result["detected_source"] == "?"
+    monkeypatch.setattr(translate_module.httpx, "AsyncClient", make_client)
 
+    await translate_text("um")
+    await translate_text("dois")
+    await translate_module.close_client()
 
-@pytest.mark.asyncio
-async def test_translate_raises_on_http_error():
-    """Deve propagar HTTPStatusError em respostas 4xx/5xx."""
-    mock_resp = _mock_error_response(status=403)
+    assert len(created) == 1
+    assert len(fake.requests) == 2
 
-    with patch("app.services.translate.httpx.AsyncClient") as mock_client_cls:
-        mock_client = AsyncMock()
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=False)
-        mock_client.post = AsyncMock(return_value=mock_resp)
-        mock_client_cls.return_value = mock_client
 
-        with pytest.raises(httpx.HTTPStatusError):
-            await translate_text("Hello")
+async def test_close_client_closes_and_resets(monkeypatch):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(FakeLibreTranslate()))
+    monkeypatch.setattr(translate_module, "_client", client)
 
+    await translate_module.close_client()
 
-@pytest.mark.asyncio
-async def test_translate_raises_on_timeout():
-    """Deve propagar TimeoutException quando a API não responder a tempo."""
-    with patch("app.services.translate.httpx.AsyncClient") as mock_client_cls:
-        mock_client = AsyncMock()
-        mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-        mock_client.__aexit__ = AsyncMock(return_value=False)
-        mock_client.post = AsyncMock(side_effect=httpx.TimeoutException("timeout"))
-        mock_client_cls.return_value = mock_client
-
-        with pytest.raises(httpx.TimeoutException):
-            await translate_text("Hello")
+    assert client.is_closed
+    assert translate_module._client is None
@@ -4,10 +4,10 @@ workers/inbox_worker.py
 Worker assíncrono que processa atividades Create recebidas no inbox do bot.
 
 Fluxo:
-1. Consome atividades da fila (activity_queue)
+1. Consome atividades da fila (activity_queue) em lotes, processados concorrentemente
 2. Verifica se o bot foi mencionado no post
 3. Extrai o texto puro removendo tags HTML
-4. Traduz via LibreTranslate
+4. Traduz via LibreTranslate — os textos do lote numa única requisição
 5. Monta um Note de resposta e entrega no inbox do autor
 """
 
@@ -16,26 +16,178 @@ import html
 import logging
 import uuid
 from datetime import datetime, timezone
-from urllib.parse import urlparse
+from html.parser import HTMLParser
+from typing import Any, Awaitable, Callable, Coroutine
+from urllib.parse import urlsplit
 
-from apkit.client.asyncio.client import ActivityPubClient
+from apkit.models import Actor as APKitActor
 from apkit.models import Create, Note
 from apkit.types import ActorKey
-from bs4 import BeautifulSoup
 from cryptography.hazmat.primitives.asymmetric import rsa as rsa_module
 
+from app.activitypub.actor import get_actor
+from app.activitypub.client import cached_actor, client_session, fetch_actor
 from app.activitypub.keys import get_bot_keys
 from app.config import settings
 from app.services.note_store import store_note
 from app.services.queue import activity_queue
-from app.services.translate import translate_text
+from app.services.translate import translate_text, translate_texts
 
 log = logging.getLogger(__name__)
 
+# Dependências substituíveis de handle_create. Translator devolve uma corrotina
+# (async def): handle_create a entrega a TaskGroup.create_task
+Translator = Callable[[str], Coroutine[Any, Any, dict[str, str]]]
+KeySource = Callable[[], Awaitable[list[ActorKey]]]
+
 MAX_TRANSLATE_CHARS = 500
 
+# Audiência pública das respostas (Note e Create)
+PUBLIC_AUDIENCE = "https://www.w3.org/ns/activitystreams#Public"
+
+# Máximo de atividades retiradas da fila por despertar do worker
+BATCH_SIZE = 64
+
+# Limite de requisições simultâneas a servidores remotos (fetch do actor + entrega).
+# O lote é processado concorrentemente; sem o limite, uma rajada abriria
+# BATCH_SIZE conexões de uma vez contra as mesmas instâncias.
+DELIVERY_CONCURRENCY = settings.get("delivery_concurrency", 16)
+_delivery_slots = asyncio.Semaphore(DELIVERY_CONCURRENCY)
+
+
+class _BatchTranslator:
+    """
+    Translator compartilhado por um lote do worker: as chamadas feitas na
+    mesma volta do event loop — os handle_create do lote chegam juntos à
+    tradução — viram uma única requisição via translate_texts.
+    Se a requisição em lote falhar, cada texto é traduzido individualmente.
+    """
+
+    def __init__(self) -> None:
+        self._pending: list[tuple[str, asyncio.Future[dict[str, str]]]] = []
+        self._flush_task: asyncio.Task[None] | None = None
+
+    async def __call__(self, text: str) -> dict[str, str]:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[dict[str, str]] = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) == 1:
+            # Agendada após os handlers já prontos nesta volta do loop
+            self._flush_task = loop.create_task(self._flush())
+        return await future
+
+    async def _flush(self) -> None:
+        pending, self._pending = self._pending, []
+        texts = [text for text, _ in pending]
+
+        results: list[dict[str, str] | BaseException]
+        if len(texts) == 1:
+            try:
+                results = [await translate_text(texts[0])]
+            except Exception as e:
+                results = [e]
+        else:
+            try:
+                results = list(await translate_texts(texts))
+            except Exception as e:
+                log.warning(f"Tradução em lote falhou ({e}); traduzindo um a um")
+                results = await asyncio.gather(
+                    *(translate_text(text) for text in texts), return_exceptions=True
+                )
+
+        for (_, future), result in zip(pending, results):
+            if future.done():  # handler cancelado
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+class _PlainTextParser(HTMLParser):
+    """
+    Coleta os nós de texto do post, pulando todo o conteúdo de <span class="mention">.
+    Conta os <span> aninhados dentro da menção (ex: "@<span>bot</span>") para
+    saber onde ela realmente termina — o que uma regex não consegue.
+    Entidades HTML já chegam decodificadas (convert_charrefs=True).
+    """
 
-async def handle_create(activity: Create) -> None:
+    def __init__(self) -> None:
+        super().__init__()
+        self.parts: list[str] = []
+        self._mention_depth = 0
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag != "span":
+            return
+        if self._mention_depth:
+            self._mention_depth += 1
+        elif "mention" in (dict(attrs).get("class") or "").split():
+            self._mention_depth = 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "span" and self._mention_depth:
+            self._mention_depth -= 1
+
+    def handle_data(self, data: str) -> None:
+        if not self._mention_depth:
+            self.parts.append(data)
+
+
+def extract_plain_text(content_html: str) -> str:
+    """
+    Texto puro do post: remove as menções e as tags (nós de texto unidos por
+    espaço), decodifica as entidades HTML e colapsa espaços em branco repetidos.
+    """
+    parser = _PlainTextParser()
+    parser.feed(content_html)
+    parser.close()
+    return " ".join(" ".join(parser.parts).split())
+
+
+async def _resolve_author(author_url: str) -> APKitActor | None:
+    """
+    Busca o actor remoto — autores recorrentes são servidos do cache com TTL,
+    sem ocupar uma vaga de _delivery_slots. Falhas são logadas e viram None.
+    """
+    remote_actor = cached_actor(author_url)
+    if remote_actor is not None:
+        return remote_actor
+
+    try:
+        async with _delivery_slots:
+            remote_actor = await fetch_actor(author_url)
+    except Exception as e:
+        log.error(f"Não foi possível resolver o actor {author_url}: {e}", exc_info=True)
+        return None
+    if remote_actor is None:
+        log.error(f"Não foi possível resolver o actor {author_url}")
+    return remote_actor
+
+
+class _AuthorUnavailable(Exception):
+    """O actor remoto não pôde ser resolvido — não há a quem entregar a resposta."""
+
+
+async def _require_author(author_url: str) -> APKitActor:
+    """_resolve_author que levanta _AuthorUnavailable em vez de devolver None."""
+    remote_actor = await _resolve_author(author_url)
+    if remote_actor is None:
+        raise _AuthorUnavailable(author_url)
+    return remote_actor
+
+
+async def handle_create(
+    activity: Create,
+    *,
+    translator: Translator | None = None,
+    key_source: KeySource | None = None,
+) -> None:
+    """
+    Traduz o post que mencionou o bot e entrega a resposta no inbox do autor.
+    `translator` e `key_source` substituem translate_text e get_bot_keys
+    (ex: fakes nos testes); None usa as implementações do módulo.
+    """
     note = activity.object
 
     log.info(
@@ -45,17 +197,16 @@ async def handle_create(activity: Create) -> None:
     if not isinstance(note, Note):
         return
 
-    bot_actor_url = f"https://{settings.domain}/users/{settings.bot_username}"
+    # URL do bot vem do actor memoizado — nada é montado por atividade, e a
+    # detecção da menção é uma única busca de substring (em C) no HTML
+    bot_actor_url = get_actor().id
     content_html = note.content or ""
 
     if bot_actor_url not in content_html:
         return
 
     # Extrai texto puro removendo a menção ao bot
-    soup = BeautifulSoup(content_html, "html.parser")
-    for tag in soup.find_all("span", {"class": "mention"}):
-        tag.decompose()
-    plain_text = soup.get_text(separator=" ").strip()
+    plain_text = extract_plain_text(content_html)
 
     if not plain_text:
         return
@@ -64,29 +215,37 @@ async def handle_create(activity: Create) -> None:
         log.warning(f"Texto truncado de {len(plain_text)} para {MAX_TRANSLATE_CHARS} caracteres")
         plain_text = plain_text[:MAX_TRANSLATE_CHARS]
 
-    # Traduz o texto
-    result = await translate_text(plain_text)
-    translated = result["translated"]
-    source_lang = result["detected_source"].upper()
-    target_lang = settings.target_language.upper()
-
     # Dados do autor
     author_url = activity.actor if isinstance(activity.actor, str) else activity.actor.id
-    parsed_author = urlparse(author_url)
+    parsed_author = urlsplit(author_url)
     if not parsed_author.scheme or not parsed_author.netloc:
         log.error(f"URL de actor inválida: {author_url!r}")
         return
     author_domain = parsed_author.netloc
-    author_username = parsed_author.path.rstrip("/").split("/")[-1]
+    author_username = parsed_author.path.rstrip("/").rpartition("/")[2]
 
-    # Busca o actor remoto
+    # Tradução e busca do actor remoto são independentes — rodam juntas. Se uma
+    # falha, o TaskGroup cancela a outra: sem tradução ou sem autor não há
+    # resposta, e a busca cancelada libera sua vaga de _delivery_slots
+    remote_actor = None
     try:
-        async with ActivityPubClient() as client:
-            remote_actor = await client.actor.fetch(author_url)
-    except Exception as e:
-        log.error(f"Não foi possível resolver o actor {author_url}: {e}", exc_info=True)
+        async with asyncio.TaskGroup() as tg:
+            translation = tg.create_task((translator or translate_text)(plain_text))
+            author = tg.create_task(_require_author(author_url))
+        result, remote_actor = translation.result(), author.result()
+    except* _AuthorUnavailable:
+        pass  # já logado em _resolve_author
+    except* Exception as eg:
+        # Só a tradução chega aqui: propaga o erro original (httpx, LibreTranslate)
+        # em vez do ExceptionGroup, para que run_worker logue a causa real
+        raise eg.exceptions[0]
+    if remote_actor is None:
         return
 
+    translated = result["translated"]
+    source_lang = result["detected_source"].upper()
+    target_lang = settings.target_language.upper()
+
     # Monta o HTML de resposta
     reply_html = (
         f'<p><span class="h-card"><a href="{author_url}">@{author_username}</a></span> '
@@ -95,18 +254,19 @@ async def handle_create(activity: Create) -> None:
         f"<p><small>Powered by libretranslate, fastapi, apkit, activitypub and bolhaverse/bolha.io</small></p>"
     )
 
-    # IDs únicos
-    note_id = f"https://{settings.domain}/users/{settings.bot_username}/notes/{uuid.uuid4()}"
-    create_id = f"https://{settings.domain}/users/{settings.bot_username}/creates/{uuid.uuid4()}"
+    # IDs únicos; Note e Create compartilham o mesmo instante de publicação
+    note_id = f"{bot_actor_url}/notes/{uuid.uuid4()}"
+    create_id = f"{bot_actor_url}/creates/{uuid.uuid4()}"
+    published = datetime.now(timezone.utc).isoformat()
 
     reply_note = Note(
         id=note_id,
         attributed_to=bot_actor_url,
         content=reply_html,
-        to=["https://www.w3.org/ns/activitystreams#Public"],
+        to=[PUBLIC_AUDIENCE],
         cc=[author_url],
         in_reply_to={"id": note.id, "type": "Note"},
-        published=datetime.now(timezone.utc).isoformat(),
+        published=published,
         tag=[
             {
                 "type": "Mention",
@@ -122,13 +282,13 @@ async def handle_create(activity: Create) -> None:
         id=create_id,
         actor=bot_actor_url,
         object=reply_note,
-        to=["https://www.w3.org/ns/activitystreams#Public"],
+        to=[PUBLIC_AUDIENCE],
         cc=[author_url],
-        published=datetime.now(timezone.utc).isoformat(),
+        published=published,
     )
 
     # Obtém as chaves e extrai a chave privada RSA
-    keys = await get_bot_keys()
+    keys = await (key_source or get_bot_keys)()
     priv_key = None
     key_id = None
     for key in keys:
@@ -143,7 +303,7 @@ async def handle_create(activity: Create) -> None:
 
     log.info(f"Enviando para {remote_actor.inbox} com key_id={key_id}")
     try:
-        async with ActivityPubClient() as client:
+        async with _delivery_slots, client_session() as client:
             async with client.post(
                 remote_actor.inbox,
                 json=reply_create,
@@ -157,14 +317,37 @@ async def handle_create(activity: Create) -> None:
         log.error(f"Erro ao entregar resposta para {author_url}: {e}", exc_info=True)
 
 
+async def _next_batch() -> list[Create]:
+    """
+    Aguarda a primeira atividade e drena, sem bloquear, as que já estiverem
+    na fila (até BATCH_SIZE) — rajadas do Mastodon chegam agrupadas.
+    """
+    batch = [await activity_queue.get()]
+    while len(batch) < BATCH_SIZE:
+        try:
+            batch.append(activity_queue.get_nowait())
+        except asyncio.QueueEmpty:
+            break
+    return batch
+
+
 async def run_worker() -> None:
+    """
+    Consome a fila até ser cancelado (shutdown do lifespan). Ocioso, fica
+    suspenso em activity_queue.get() — sem timeout nem despertares periódicos.
+    """
     log.info("Worker de inbox iniciado")
     while True:
-        try:
-            ctx = await asyncio.wait_for(activity_queue.get(), timeout=5.0)
-            await handle_create(ctx)
+        batch = await _next_batch()
+
+        # return_exceptions isola as falhas: um item com erro não derruba o lote.
+        # As traduções do lote saem numa única requisição à LibreTranslate.
+        translator = _BatchTranslator()
+        results = await asyncio.gather(
+            *(handle_create(activity, translator=translator) for activity in batch),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                log.error(f"Erro no worker: {result}", exc_info=result)
             activity_queue.task_done()
-        except asyncio.TimeoutError:
-            continue
-        except Exception as e:
-            log.error(f"Erro no worker: {e}", exc_info=True)